@@ -10,9 +10,13 @@ Key fixes:
 
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import ClockCycles, Timer
+from cocotb.triggers import ClockCycles, RisingEdge, FallingEdge, First, ReadOnly
 import threading
-import queue
+import collections
+import time
+import logging
+from functools import lru_cache
+import numpy as np
 
 try:
     import pygame
@@ -20,23 +24,43 @@ try:
 except ImportError:
     PYGAME_AVAILABLE = False
 
-COLORS = {
-    0b000: (0, 0, 0), 0b001: (0, 0, 255), 0b010: (0, 255, 0), 0b011: (0, 255, 255),
-    0b100: (255, 0, 0), 0b101: (255, 0, 255), 0b110: (255, 255, 0), 0b111: (255, 255, 255)
-}
-COLOR_NAMES = {
-    0b000: "Black", 0b001: "Blue", 0b010: "Green", 0b011: "Cyan",
-    0b100: "Red", 0b101: "Magenta", 0b110: "Yellow", 0b111: "White"
-}
-SYMMETRY_MODES = ["Off", "H-Mirror", "V-Mirror", "4-Way"]
+# Indexed by the 3-bit RGB colour value
+COLORS = (
+    (0, 0, 0), (0, 0, 255), (0, 255, 0), (0, 255, 255),
+    (255, 0, 0), (255, 0, 255), (255, 255, 0), (255, 255, 255),
+)
+COLOR_NAMES = ("Black", "Blue", "Green", "Cyan", "Red", "Magenta", "Yellow", "White")
+# 8-bit surface palette: colour index -> RGB, padded to 256 entries
+PALETTE = list(COLORS) + [(0, 0, 0)] * 248
+SYMMETRY_MODES = ("Off", "H-Mirror", "V-Mirror", "4-Way")
+# Sidebar strings that only depend on small enumerations, formatted once
+BRUSH_LABELS = tuple(f"Brush: {n}x{n}" for n in range(1, 9))  # brush_size is 3 bits
+SYMMETRY_LABELS = tuple(f"Symmetry: {mode}" for mode in SYMMETRY_MODES)
+# I2C byte readouts, one preformatted string per possible byte value
+I2C_X_LABELS = tuple(f"X: 0x{v:02X}" for v in range(256))
+I2C_Y_LABELS = tuple(f"Y: 0x{v:02X}" for v in range(256))
+I2C_STATUS_LABELS = tuple(f"Status: 0x{v:02X}" for v in range(256))
+RGB_CHANNELS = (("R", 0b100, (255, 60, 60)), ("G", 0b010, (60, 255, 60)), ("B", 0b001, (60, 60, 255)))
+# pygame_state fields shown in the sidebar; a change in any of them re-renders it
+SIDEBAR_FIELDS = ('color_idx', 'brush_mode', 'brush_size', 'symmetry_mode',
+                  'fill_mode', 'fill_corner_a', 'cursor_x', 'cursor_y', 'undo_count', 'redo_count',
+                  'i2c_x', 'i2c_y', 'i2c_status', 'i2c_count', 'status_message')
 CANVAS_WIDTH = 256
 CANVAS_HEIGHT = 256
+CLK_PERIOD_NS = 20
+RENDER_FPS = 30  # Verilog-driven state changes far slower than this
 BUTTON_ORDER = ['b', 'y', 'select', 'start', 'up', 'down', 'left', 'right', 'a', 'x', 'l', 'r']
+BRUSH_BUTTONS = ('l', 'r', 'start')  # buttons that can change brush size / symmetry
+
+# Per-call dedup bitmap for move_continuous, reused instead of a fresh set of tuples
+_seen = np.zeros((CANVAS_HEIGHT, CANVAS_WIDTH), dtype=bool)
+# Packet pixels gathered by pkt_monitor while move_continuous has capture enabled
+pkt_capture = {'enabled': False, 'packed': []}
 
 pygame_state = {
-    'canvas': [[0] * CANVAS_WIDTH for _ in range(CANVAS_HEIGHT)],
+    'canvas': np.zeros((CANVAS_HEIGHT, CANVAS_WIDTH), dtype=np.uint8),
     'cursor_x': 128, 'cursor_y': 128,
-    'sw_red': False, 'sw_green': False, 'sw_blue': False,
+    'color_idx': 0,  # packed RGB switches: (R << 2) | (G << 1) | B
     'brush_mode': True,
     'brush_size': 0,
     'symmetry_mode': 0,
@@ -46,27 +70,73 @@ pygame_state = {
     'undo_count': 0, 'redo_count': 0,
     'status_message': '',
     'running': True,
-    'update_queue': queue.Queue()
+    'update_queue': collections.deque(),  # single producer / single consumer, no lock needed
+    'update_event': threading.Event(),  # set whenever something is queued
+    'canvas_dirty': True,
+    'dirty_bbox': None,  # [xmin, ymin, xmax, ymax] of pixels changed since last present
 }
 
 
+def post_update(update):
+    """Queue an update for the pygame thread (deque.append is atomic).
+    Updates are tuples tagged by their first item: ('pixels_bulk', packed) or ('state', fields)
+    """
+    pygame_state['update_queue'].append(update)
+    pygame_state['update_event'].set()
+
+
+def pack_pixel(x, y, color):
+    """Pack an on-canvas pixel into one int: colour << 16 | y << 8 | x"""
+    return (color << 16) | (y << 8) | x
+
+
+def post_pixels(packed):
+    """Queue a list of packed pixels as a single 'pixels_bulk' update"""
+    if packed:
+        post_update(('pixels_bulk', np.array(packed, dtype=np.uint32)))
+
+
+def take_updates():
+    """Pop every pending update. The event is cleared first so a concurrent post re-arms it."""
+    pygame_state['update_event'].clear()
+    queue = pygame_state['update_queue']
+    batch = []
+    while queue:
+        batch.append(queue.popleft())
+    return batch
+
+
+def apply_updates(batch):
+    """Apply a drained batch: pixels go to the canvas in one scatter, in queue order.
+    Returns (bbox of touched pixels or None, whether any 'state' update was applied)
+    """
+    chunks = []
+    state_changed = False
+    for update in batch:
+        kind = update[0]
+        if kind == 'pixels_bulk':
+            chunks.append(update[1])
+        elif kind == 'state':
+            pygame_state.update(update[1])
+            state_changed = True
+    if not chunks:
+        return None, state_changed
+    
+    # 8-bit x/y fields always land inside the 256x256 canvas
+    packed = np.concatenate(chunks)
+    xs = packed & 0xFF
+    ys = (packed >> 8) & 0xFF
+    pygame_state['canvas'][ys, xs] = packed >> 16
+    return (int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max())), state_changed
+
+
 def pygame_thread():
     """Full interface pygame thread matching interactive_emulator.py"""
     if not PYGAME_AVAILABLE:
         while pygame_state['running']:
-            try:
-                while True:
-                    update = pygame_state['update_queue'].get_nowait()
-                    if update['type'] == 'pixel':
-                        x, y, color = update['x'], update['y'], update['color']
-                        if 0 <= x < CANVAS_WIDTH and 0 <= y < CANVAS_HEIGHT:
-                            pygame_state['canvas'][y][x] = color
-                    elif update['type'] == 'state':
-                        pygame_state.update(update['data'])
-            except queue.Empty:
-                pass
-            import time
-            time.sleep(0.016)
+            # Wake as soon as something is queued; the timeout only bounds shutdown latency
+            pygame_state['update_event'].wait(1 / RENDER_FPS)
+            apply_updates(take_updates())
         return
     
     pygame.init()
@@ -97,6 +167,44 @@ def pygame_thread():
     
     clock = pygame.time.Clock()
     
+    # Indexed 8-bit canvas (colour indices written straight into its pixels) and its
+    # scaled copy, rebuilt only when pixels change or the layout resizes
+    canvas_surf8 = pygame.Surface((CANVAS_WIDTH, CANVAS_HEIGHT), depth=8)
+    canvas_surf8.set_palette(PALETTE)
+    canvas_surface = None
+    full_redraw = True
+    
+    # Rendered text keyed by (font, string, colour); sidebar redrawn only when its inputs change
+    text_cache = {}
+    sidebar_surface = None
+    sidebar_key = None
+    
+    def T(font, s, c):
+        k = (id(font), s, c)
+        v = text_cache.get(k)
+        if v is None:
+            if len(text_cache) > 512:
+                text_cache.clear()
+            v = text_cache[k] = font.render(s, True, c)
+        return v
+    
+    def mark_region(xmin, ymin, xmax, ymax):
+        bbox = pygame_state['dirty_bbox']
+        if bbox is None:
+            pygame_state['dirty_bbox'] = [xmin, ymin, xmax, ymax]
+        else:
+            bbox[0] = min(bbox[0], xmin)
+            bbox[1] = min(bbox[1], ymin)
+            bbox[2] = max(bbox[2], xmax)
+            bbox[3] = max(bbox[3], ymax)
+        pygame_state['canvas_dirty'] = True
+    
+    @lru_cache(maxsize=64)
+    def cursor_geometry(cell_size, brush_size):
+        """Cursor box offset from the cell origin and its size, per (layout, brush size)"""
+        size = max(cell_size * (brush_size + 2), 8)
+        return cell_size // 2 - size // 2, size
+    
     def recalculate_layout():
         nonlocal window_width, window_height, grid_size, sidebar_width
         available_w = window_width - sidebar_width - 60
@@ -110,22 +218,24 @@ def pygame_thread():
         return cell_size, canvas_x, canvas_y, canvas_width, canvas_height
     
     def draw_header():
-        title = font_title.render("FIXED DEBUG DEMO", True, accent_color)
+        title = T(font_title, "FIXED DEBUG DEMO", accent_color)
         screen.blit(title, (window_width // 2 - title.get_width() // 2, 15))
         
         hint = "Directions Fixed | Continuous Lines | Correct Colors"
-        screen.blit(font_small.render(hint, True, (120, 120, 130)),
+        screen.blit(T(font_small, hint, (120, 120, 130)),
                    (window_width // 2 - 230, 45))
     
     def draw_canvas(cell_size, canvas_x, canvas_y, canvas_width, canvas_height):
-        # Draw canvas pixels
-        for cy in range(grid_size):
-            for cx in range(grid_size):
-                screen_y = grid_size - 1 - cy
-                rect = pygame.Rect(canvas_x + cx * cell_size,
-                                  canvas_y + screen_y * cell_size,
-                                  cell_size, cell_size)
-                pygame.draw.rect(screen, COLORS[pygame_state['canvas'][cy][cx]], rect)
+        nonlocal canvas_surface
+        # Draw canvas pixels: copy indices into the 8-bit surface (row 0 at the bottom), then one scaled blit
+        if (canvas_surface is None or pygame_state['canvas_dirty']
+                or canvas_surface.get_size() != (canvas_width, canvas_height)):
+            px = pygame.surfarray.pixels2d(canvas_surf8)  # (x, y) view, row 0 at the top
+            px[:] = pygame_state['canvas'][::-1].T
+            del px  # release the surface lock before scaling
+            canvas_surface = pygame.transform.scale(canvas_surf8, (canvas_width, canvas_height))
+            pygame_state['canvas_dirty'] = False
+        screen.blit(canvas_surface, (canvas_x, canvas_y))
         
         # Canvas border
         pygame.draw.rect(screen, (80, 80, 90),
@@ -133,13 +243,12 @@ def pygame_thread():
                          canvas_width + 4, canvas_height + 4), 2)
         
         # Cursor
-        cursor_size = max(cell_size * (pygame_state['brush_size'] + 2), 8)
+        offset, cursor_size = cursor_geometry(cell_size, pygame_state['brush_size'])
         screen_y = grid_size - 1 - pygame_state['cursor_y']
-        cx = canvas_x + pygame_state['cursor_x'] * cell_size + cell_size // 2
-        cy = canvas_y + screen_y * cell_size + cell_size // 2
         cursor_color = (255, 100, 100) if pygame_state['fill_mode'] else (255, 255, 0)
         pygame.draw.rect(screen, cursor_color,
-                        (cx - cursor_size // 2, cy - cursor_size // 2, cursor_size, cursor_size), 2)
+                        (canvas_x + pygame_state['cursor_x'] * cell_size + offset,
+                         canvas_y + screen_y * cell_size + offset, cursor_size, cursor_size), 2)
         
         # Fill corner A marker
         if pygame_state['fill_corner_a']:
@@ -160,181 +269,315 @@ def pygame_thread():
             rh = (max_y - min_y + 1) * cell_size
             pygame.draw.rect(screen, (255, 100, 100), (rx, ry, rw, rh), 1)
     
-    def draw_sidebar():
-        sx = window_width - sidebar_width + 15
-        y = 70
+    def render_sidebar(surface):
+        """Draw the sidebar panel into its own surface (local coordinates, origin at sidebar_origin())"""
+        surface.fill(bg_color)
+        sx = 10
+        y = 10
         
-        pygame.draw.rect(screen, panel_color,
+        pygame.draw.rect(surface, panel_color,
                         (sx - 10, y - 10, sidebar_width - 20, window_height - 90),
                         border_radius=10)
         
         # Color swatch
-        color = (int(pygame_state['sw_red']) << 2) | (int(pygame_state['sw_green']) << 1) | int(pygame_state['sw_blue'])
-        pygame.draw.rect(screen, COLORS[color], (sx, y, 60, 60))
-        pygame.draw.rect(screen, text_color, (sx, y, 60, 60), 2)
+        color = pygame_state['color_idx']
+        pygame.draw.rect(surface, COLORS[color], (sx, y, 60, 60))
+        pygame.draw.rect(surface, text_color, (sx, y, 60, 60), 2)
         
-        screen.blit(font_large.render(COLOR_NAMES[color], True, text_color), (sx + 70, y + 5))
+        surface.blit(T(font_large, COLOR_NAMES[color], text_color), (sx + 70, y + 5))
         
         mode_text = "BRUSH" if pygame_state['brush_mode'] else "ERASER"
         mode_color = (80, 255, 120) if pygame_state['brush_mode'] else (255, 100, 100)
-        screen.blit(font_medium.render(f"Paint: {mode_text}", True, mode_color), (sx + 70, y + 35))
+        surface.blit(T(font_medium, f"Paint: {mode_text}", mode_color), (sx + 70, y + 35))
         y += 75
         
         # Fill mode indicator
         fill_text = "FILL MODE ON" if pygame_state['fill_mode'] else "Fill Mode Off"
         fill_color = (255, 100, 100) if pygame_state['fill_mode'] else (100, 100, 110)
-        screen.blit(font_medium.render(fill_text, True, fill_color), (sx, y))
+        surface.blit(T(font_medium, fill_text, fill_color), (sx, y))
         y += 25
         
         if pygame_state['fill_mode'] and pygame_state['fill_corner_a']:
             corner_text = f"Corner A: {pygame_state['fill_corner_a']}"
-            screen.blit(font_small.render(corner_text, True, (255, 150, 150)), (sx, y))
+            surface.blit(T(font_small, corner_text, (255, 150, 150)), (sx, y))
             y += 20
         y += 5
         
         # RGB channels
-        for label, state, clr in [("R", pygame_state['sw_red'], (255, 60, 60)),
-                                   ("G", pygame_state['sw_green'], (60, 255, 60)),
-                                   ("B", pygame_state['sw_blue'], (60, 60, 255))]:
-            screen.blit(font_large.render(label, True, text_color), (sx, y))
-            pygame.draw.rect(screen, clr if state else (50, 50, 55), (sx + 25, y, 50, 22))
-            pygame.draw.rect(screen, text_color, (sx + 25, y, 50, 22), 1)
-            screen.blit(font_small.render("ON" if state else "OFF", True, text_color), (sx + 85, y + 3))
+        for label, bit, clr in RGB_CHANNELS:
+            state = color & bit
+            surface.blit(T(font_large, label, text_color), (sx, y))
+            pygame.draw.rect(surface, clr if state else (50, 50, 55), (sx + 25, y, 50, 22))
+            pygame.draw.rect(surface, text_color, (sx + 25, y, 50, 22), 1)
+            surface.blit(T(font_small, "ON" if state else "OFF", text_color), (sx + 85, y + 3))
             y += 28
         y += 10
         
         # Status info
-        screen.blit(font_medium.render(f"Position: ({pygame_state['cursor_x']}, {pygame_state['cursor_y']})", True, text_color), (sx, y))
+        surface.blit(T(font_medium, f"Position: ({pygame_state['cursor_x']}, {pygame_state['cursor_y']})", text_color), (sx, y))
         y += 25
-        screen.blit(font_medium.render(f"Brush: {pygame_state['brush_size'] + 1}x{pygame_state['brush_size'] + 1}", True, text_color), (sx, y))
+        surface.blit(T(font_medium, BRUSH_LABELS[pygame_state['brush_size']], text_color), (sx, y))
         y += 25
-        screen.blit(font_medium.render(f"Symmetry: {SYMMETRY_MODES[pygame_state['symmetry_mode']]}", True, text_color), (sx, y))
+        surface.blit(T(font_medium, SYMMETRY_LABELS[pygame_state['symmetry_mode']], text_color), (sx, y))
         y += 30
         
-        screen.blit(font_small.render(f"Undo: {pygame_state['undo_count']} | Redo: {pygame_state['redo_count']}", True, (150, 150, 160)), (sx, y))
+        surface.blit(T(font_small, f"Undo: {pygame_state['undo_count']} | Redo: {pygame_state['redo_count']}", (150, 150, 160)), (sx, y))
         y += 25
         
         # I2C Output
-        screen.blit(font_medium.render("I2C Output:", True, accent_color), (sx, y))
+        surface.blit(T(font_medium, "I2C Output:", accent_color), (sx, y))
         y += 22
-        for info in [f"X: 0x{pygame_state['i2c_x']:02X}", f"Y: 0x{pygame_state['i2c_y']:02X}",
-                     f"Status: 0x{pygame_state['i2c_status']:02X}", f"Packets: {pygame_state['i2c_count']}"]:
-            screen.blit(font_small.render(info, True, (180, 180, 190)), (sx + 10, y))
+        for info in (I2C_X_LABELS[pygame_state['i2c_x'] & 0xFF], I2C_Y_LABELS[pygame_state['i2c_y'] & 0xFF],
+                     I2C_STATUS_LABELS[pygame_state['i2c_status'] & 0xFF], f"Packets: {pygame_state['i2c_count']}"):
+            surface.blit(T(font_small, info, (180, 180, 190)), (sx + 10, y))
             y += 18
         
         y += 15
-        screen.blit(font_medium.render("Debug Info:", True, text_color), (sx, y))
+        surface.blit(T(font_medium, "Debug Info:", text_color), (sx, y))
         y += 22
         if pygame_state['status_message']:
-            screen.blit(font_small.render(pygame_state['status_message'], True, highlight), (sx, y))
+            surface.blit(T(font_small, pygame_state['status_message'], highlight), (sx, y))
             y += 18
     
+    def sidebar_origin():
+        """Top-left of the sidebar surface: the panel's corner, below the header"""
+        return window_width - sidebar_width + 5, 60
+    
+    def draw_sidebar(key):
+        nonlocal sidebar_surface, sidebar_key
+        sidebar_dirty = key != sidebar_key
+        if sidebar_surface is None or sidebar_surface.get_height() != window_height - 60:
+            sidebar_surface = pygame.Surface((sidebar_width - 5, window_height - 60))
+            sidebar_dirty = True
+        if sidebar_dirty:
+            render_sidebar(sidebar_surface)
+            sidebar_key = key
+        screen.blit(sidebar_surface, sidebar_origin())
+    
     def draw_message(canvas_x, canvas_y, canvas_height):
         if pygame_state['status_message']:
-            msg = font_large.render(pygame_state['status_message'], True, highlight)
+            msg = T(font_large, pygame_state['status_message'], highlight)
             pygame.draw.rect(screen, (40, 40, 50),
                            (canvas_x, canvas_y + canvas_height + 10, msg.get_width() + 20, 30),
                            border_radius=5)
             screen.blit(msg, (canvas_x + 10, canvas_y + canvas_height + 15))
     
+    layout = recalculate_layout()
+    
     while pygame_state['running']:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame_state['running'] = False
                 return
-            if event.type == pygame.VIDEORESIZE:
+            if event.type == pygame.VIDEORESIZE and (event.w, event.h) != (window_width, window_height):
                 window_width, window_height = event.w, event.h
                 screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                layout = recalculate_layout()
+                full_redraw = True
         
         # Process updates from queue
-        try:
-            for _ in range(1000):
-                update = pygame_state['update_queue'].get_nowait()
-                if update['type'] == 'pixel':
-                    x, y, color = update['x'], update['y'], update['color']
-                    if 0 <= x < CANVAS_WIDTH and 0 <= y < CANVAS_HEIGHT:
-                        pygame_state['canvas'][y][x] = color
-                elif update['type'] == 'state':
-                    pygame_state.update(update['data'])
-        except queue.Empty:
-            pass
-        
-        # Recalculate layout
-        cell_size, canvas_x, canvas_y, canvas_width, canvas_height = recalculate_layout()
+        bbox, state_changed = apply_updates(take_updates())
+        if bbox is not None:
+            mark_region(*bbox)
+        if state_changed:
+            # Cursor / fill preview can move anywhere on the canvas
+            full_redraw = True
+        
+        # Nothing to show: skip the frame entirely
+        key = tuple(pygame_state[k] for k in SIDEBAR_FIELDS)
+        if not (full_redraw or pygame_state['canvas_dirty'] or key != sidebar_key):
+            # Idle: sleep until the next update arrives, at most one frame so events still get pumped
+            pygame_state['update_event'].wait(1 / RENDER_FPS)
+            continue
+        
+        # Layout only changes on resize
+        cell_size, canvas_x, canvas_y, canvas_width, canvas_height = layout
         
         # Draw everything
         screen.fill(bg_color)
         draw_header()
         draw_canvas(cell_size, canvas_x, canvas_y, canvas_width, canvas_height)
-        draw_sidebar()
+        draw_sidebar(key)
         draw_message(canvas_x, canvas_y, canvas_height)
         
-        pygame.display.flip()
-        clock.tick(60)
+        if full_redraw:
+            pygame.display.flip()
+        else:
+            # Sidebar and message read status_message directly, so always push them
+            rects = [sidebar_surface.get_rect(topleft=sidebar_origin()),
+                     (canvas_x, canvas_y + canvas_height + 10,
+                      window_width - sidebar_width - canvas_x, 30)]
+            bbox = pygame_state['dirty_bbox']
+            if bbox is not None:
+                xmin, ymin, xmax, ymax = bbox
+                rects.append((canvas_x + xmin * cell_size,
+                              canvas_y + (grid_size - 1 - ymax) * cell_size,
+                              (xmax - xmin + 1) * cell_size,
+                              (ymax - ymin + 1) * cell_size))
+            pygame.display.update(rects)
+        pygame_state['dirty_bbox'] = None
+        full_redraw = False
+        clock.tick(RENDER_FPS)
     
     pygame.quit()
 
 
+# Shadow of the value last driven onto ui_in, so senders never read it back
+ui_in_state = {'value': 0}
+
+
+async def clock_edges(dut, n):
+    """Wait n rising clock edges on the shared RisingEdge(dut.clk) trigger (cheaper than ClockCycles for tiny n)"""
+    edge = RisingEdge(dut.clk)
+    for _ in range(n):
+        await edge
+
+
+def drive_ui_in(dut, value):
+    """Drive ui_in and remember what was written"""
+    ui_in_state['value'] = value
+    # PMOD lines pass through 2-FF synchronizers and each level is held for a full
+    # clock, so an immediate write is safe and skips the scheduled-write round trip
+    dut.ui_in.setimmediatevalue(value)
+
+
+@lru_cache(maxsize=128)
+def encode_buttons(pressed):
+    """12-bit PMOD frame for a frozenset of pressed button names (B is bit 11)"""
+    return sum(1 << (11 - i) for i, btn in enumerate(BUTTON_ORDER) if btn in pressed)
+
+
 async def send_pmod_bit(dut, bit):
     """Send a single bit via PMOD protocol - ULTRA FAST (2 cycles per bit)"""
-    current = dut.ui_in.value.integer & ~((1 << 6) | (1 << 5))  # Clear data and clock
+    current = ui_in_state['value'] & ~((1 << 6) | (1 << 5))  # Clear data and clock
     if bit:
         current |= (1 << 6)  # Set data bit
     # Data set, clock low
-    dut.ui_in.value = current
-    await ClockCycles(dut.clk, 1)
+    drive_ui_in(dut, current)
+    await RisingEdge(dut.clk)
     # Clock high (rising edge samples data)
-    dut.ui_in.value = current | (1 << 5)
-    await ClockCycles(dut.clk, 1)
+    drive_ui_in(dut, current | (1 << 5))
+    await RisingEdge(dut.clk)
 
 
-async def send_buttons(dut, buttons, log=False):
+async def send_buttons(dut, buttons, log=False, hold=0):
     """Send button state via PMOD protocol - ULTRA FAST (~27 cycles total)
     Button order: B, Y, SELECT, START, UP, DOWN, LEFT, RIGHT, A, X, L, R
+    hold: extra cycles to wait after the latch, folded into its final wait
     """
+    if any(buttons.get(btn) for btn in BRUSH_BUTTONS):
+        _brush_cache.clear()
+    
     # Clear PMOD signals (keep lower 4 bits)
-    dut.ui_in.value = dut.ui_in.value.integer & 0x0F
-    await ClockCycles(dut.clk, 1)
+    drive_ui_in(dut, ui_in_state['value'] & 0x0F)
+    await RisingEdge(dut.clk)
     
     # Send 12 bits (2 cycles each = 24 cycles)
-    for btn in BUTTON_ORDER:
-        bit = 1 if buttons.get(btn, 0) else 0
-        await send_pmod_bit(dut, bit)
+    bits = encode_buttons(frozenset(k for k, v in buttons.items() if v))
+    for i in range(11, -1, -1):
+        await send_pmod_bit(dut, (bits >> i) & 1)
     
     # Latch pulse (rising edge captures data)
-    dut.ui_in.value = dut.ui_in.value.integer | (1 << 4)
-    await ClockCycles(dut.clk, 1)
-    dut.ui_in.value = dut.ui_in.value.integer & ~(1 << 4)
-    await ClockCycles(dut.clk, 1)
+    drive_ui_in(dut, ui_in_state['value'] | (1 << 4))
+    await RisingEdge(dut.clk)
+    drive_ui_in(dut, ui_in_state['value'] & ~(1 << 4))
+    await clock_edges(dut, 1 + hold)
 
 
 async def press_button_with_edge(dut, button_dict, log=False):
     """Press a button with proper edge detection - ULTRA FAST"""
     # Ensure released first
-    await send_buttons(dut, {})
-    await ClockCycles(dut.clk, 1)
-    # Press
-    await send_buttons(dut, button_dict)
-    await ClockCycles(dut.clk, 2)  # Hold for edge detection
+    await send_buttons(dut, {}, hold=1)
+    # Press, held for edge detection
+    await send_buttons(dut, button_dict, hold=2)
     # Release
-    await send_buttons(dut, {})
-    await ClockCycles(dut.clk, 1)
+    await send_buttons(dut, {}, hold=1)
+
+
+_sig_cache = {}
+# brush_size / symmetry_mode as last read from the DUT; cleared by send_buttons on L/R/Start
+_brush_cache = {}
+
+
+def get_handle(dut, path):
+    """Resolve a dotted signal path once and memoize the handle (None if missing)"""
+    h = _sig_cache.get(path)
+    if h is None:
+        try:
+            obj = dut
+            for p in path.split('.'):
+                obj = getattr(obj, p)
+        except AttributeError:
+            return None
+        h = _sig_cache[path] = obj
+    return h
 
 
 def read_signal(dut, path):
     """Safely read a signal"""
+    h = get_handle(dut, path)
+    if h is None:
+        return None
     try:
-        parts = path.split('.')
-        obj = dut
-        for p in parts:
-            obj = getattr(obj, p)
-        return int(obj.value)
-    except:
+        return int(h.value)
+    except ValueError:
         return None
 
 
-async def log_state(dut, label=""):
+def get_brush_settings(dut):
+    """Return (brush_size, symmetry_mode), reading the DUT only after a brush button press"""
+    if not _brush_cache:
+        _brush_cache['brush_size'] = read_signal(dut, 'user_project.brush_inst.brush_size') or 0
+        _brush_cache['symmetry_mode'] = read_signal(dut, 'user_project.brush_inst.symmetry_mode') or 0
+    return _brush_cache['brush_size'], _brush_cache['symmetry_mode']
+
+
+async def capture_pixels(dut, inst, colour_path, packed):
+    """Background monitor: append packed pixels from `inst` (pixel_valid/restore_valid,
+    x_out, y_out) to `packed`. Sleeps until valid rises, then samples every cycle it stays high.
+    """
+    valid = get_handle(dut, f'{inst}.pixel_valid')
+    if valid is None:
+        valid = get_handle(dut, f'{inst}.restore_valid')
+    x_h = get_handle(dut, f'{inst}.x_out')
+    y_h = get_handle(dut, f'{inst}.y_out')
+    colour_h = get_handle(dut, colour_path)
+    if None in (valid, x_h, y_h, colour_h):
+        return
+    while True:
+        await RisingEdge(valid)
+        await ReadOnly()
+        while int(valid.value):
+            packed.append(pack_pixel(int(x_h.value), int(y_h.value), int(colour_h.value)))
+            await RisingEdge(dut.clk)
+            await ReadOnly()
+
+
+async def pkt_monitor(dut):
+    """Long-lived monitor: pack each pkt_inst pixel into pkt_capture while capture is enabled"""
+    valid = get_handle(dut, 'user_project.pkt_inst.valid')
+    x_h = get_handle(dut, 'user_project.pkt_inst.x_out')
+    y_h = get_handle(dut, 'user_project.pkt_inst.y_out')
+    colour_h = get_handle(dut, 'user_project.colour_inst.colour_out')
+    if None in (valid, x_h, y_h, colour_h):
+        return
+    packed = pkt_capture['packed']
+    while True:
+        await RisingEdge(valid)  # one-cycle pulse per pixel
+        if not pkt_capture['enabled']:
+            continue
+        await ReadOnly()
+        x, y = int(x_h.value), int(y_h.value)
+        if 0 <= x < 256 and 0 <= y < 256 and not _seen[y, x]:
+            _seen[y, x] = True
+            packed.append(pack_pixel(x, y, int(colour_h.value)))
+
+
+def log_state(dut, label=""):
     """Log current state of key signals"""
+    if not dut._log.isEnabledFor(logging.INFO):
+        return
+    
     # Gamepad signals (from gamepad module)
     gp_a = read_signal(dut, 'user_project.gamepad_inst.a')
     gp_y = read_signal(dut, 'user_project.gamepad_inst.y')
@@ -362,50 +605,43 @@ async def log_state(dut, label=""):
     pkt_x = read_signal(dut, 'user_project.pkt_inst.x_out')
     pkt_y = read_signal(dut, 'user_project.pkt_inst.y_out')
     
-    dut._log.info(f"""
---- {label} ---
-Gamepad:    gp_a={gp_a}, gp_y={gp_y}, gp_x={gp_x}
-Switches:   sw_red={sw_red}, sw_green={sw_green}, sw_blue={sw_blue}
-Colour:     colour_out={colour_out}, paint_enable={paint_enable}
-Position:   x={x_pos}, y={y_pos}
-Trigger:    movement={movement}, freehand_trigger={freehand_trigger}
-Packet:     valid={pkt_valid}, x={pkt_x}, y={pkt_y}
-""")
+    dut._log.info("""
+--- %s ---
+Gamepad:    gp_a=%s, gp_y=%s, gp_x=%s
+Switches:   sw_red=%s, sw_green=%s, sw_blue=%s
+Colour:     colour_out=%s, paint_enable=%s
+Position:   x=%s, y=%s
+Trigger:    movement=%s, freehand_trigger=%s
+Packet:     valid=%s, x=%s, y=%s
+""", label, gp_a, gp_y, gp_x, sw_red, sw_green, sw_blue, colour_out, paint_enable,
+        x_pos, y_pos, movement, freehand_trigger, pkt_valid, pkt_x, pkt_y)
 
 
-async def update_pygame_state(dut):
+def update_pygame_state(dut):
     """Read state from Verilog and update pygame"""
-    try:
-        sw_red = read_signal(dut, 'user_project.sw_red')
-        sw_green = read_signal(dut, 'user_project.sw_green')
-        sw_blue = read_signal(dut, 'user_project.sw_blue')
-        brush_mode = read_signal(dut, 'user_project.brush_mode')
-        brush_size = read_signal(dut, 'user_project.brush_inst.brush_size')
-        symmetry_mode = read_signal(dut, 'user_project.brush_inst.symmetry_mode')
-        fill_active = read_signal(dut, 'user_project.fill_mode_inst.fill_active')
-        x_pos = read_signal(dut, 'user_project.pos_inst.x_pos')
-        y_pos = read_signal(dut, 'user_project.pos_inst.y_pos')
-        status_reg = read_signal(dut, 'user_project.status_reg')
-        
-        pygame_state['update_queue'].put({
-            'type': 'state',
-            'data': {
-                'sw_red': bool(sw_red) if sw_red is not None else False,
-                'sw_green': bool(sw_green) if sw_green is not None else False,
-                'sw_blue': bool(sw_blue) if sw_blue is not None else False,
-                'brush_mode': bool(brush_mode) if brush_mode is not None else True,
-                'brush_size': brush_size if brush_size is not None else 0,
-                'symmetry_mode': symmetry_mode if symmetry_mode is not None else 0,
-                'fill_mode': bool(fill_active) if fill_active is not None else False,
-                'cursor_x': x_pos if x_pos is not None else 128,
-                'cursor_y': y_pos if y_pos is not None else 128,
-                'i2c_x': x_pos if x_pos is not None else 0,
-                'i2c_y': y_pos if y_pos is not None else 0,
-                'i2c_status': status_reg if status_reg is not None else 0,
-            }
-        })
-    except:
-        pass
+    sw_red = read_signal(dut, 'user_project.sw_red')
+    sw_green = read_signal(dut, 'user_project.sw_green')
+    sw_blue = read_signal(dut, 'user_project.sw_blue')
+    brush_mode = read_signal(dut, 'user_project.brush_mode')
+    brush_size = read_signal(dut, 'user_project.brush_inst.brush_size')
+    symmetry_mode = read_signal(dut, 'user_project.brush_inst.symmetry_mode')
+    fill_active = read_signal(dut, 'user_project.fill_mode_inst.fill_active')
+    x_pos = read_signal(dut, 'user_project.pos_inst.x_pos')
+    y_pos = read_signal(dut, 'user_project.pos_inst.y_pos')
+    status_reg = read_signal(dut, 'user_project.status_reg')
+    
+    post_update(('state', {
+        'color_idx': ((sw_red or 0) << 2) | ((sw_green or 0) << 1) | (sw_blue or 0),
+        'brush_mode': bool(brush_mode) if brush_mode is not None else True,
+        'brush_size': brush_size if brush_size is not None else 0,
+        'symmetry_mode': symmetry_mode if symmetry_mode is not None else 0,
+        'fill_mode': bool(fill_active) if fill_active is not None else False,
+        'cursor_x': x_pos if x_pos is not None else 128,
+        'cursor_y': y_pos if y_pos is not None else 128,
+        'i2c_x': x_pos if x_pos is not None else 0,
+        'i2c_y': y_pos if y_pos is not None else 0,
+        'i2c_status': status_reg if status_reg is not None else 0,
+    }))
 
 
 @cocotb.test()
@@ -418,7 +654,7 @@ async def test_debug_demo(dut):
     
     # Start clock
     dut._log.info("Starting clock...")
-    cocotb.start_soon(Clock(dut.clk, 20, units="ns").start())
+    cocotb.start_soon(Clock(dut.clk, CLK_PERIOD_NS, units="ns").start())
     await ClockCycles(dut.clk, 5)
     dut._log.info("Clock started")
     
@@ -426,7 +662,7 @@ async def test_debug_demo(dut):
     dut._log.info("=== RESET ===")
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    drive_ui_in(dut, 0)
     dut.uio_in.value = 0
     await ClockCycles(dut.clk, 10)
     dut._log.info("Reset asserted for 10 cycles")
@@ -443,11 +679,13 @@ async def test_debug_demo(dut):
     await ClockCycles(dut.clk, 500)  # ~10us at 50MHz
     dut._log.info("Pygame thread should be running now")
     
+    pkt_task = cocotb.start_soon(pkt_monitor(dut))
+    
     # Log initial state
     dut._log.info("Reading initial state...")
-    await log_state(dut, "Initial state after reset")
+    log_state(dut, "Initial state after reset")
     dut._log.info("Updating pygame state...")
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     dut._log.info("Initial state updated")
     
     # =========================================================================
@@ -489,7 +727,7 @@ async def test_debug_demo(dut):
     
     dut._log.info(f"sw_red = {sw_red}")
     pygame_state['status_message'] = "TEST 1: Red enabled"
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # =========================================================================
     # Test 2: Movement and Painting - Draw a pattern
@@ -527,7 +765,7 @@ async def test_debug_demo(dut):
         paint_enable = read_signal(dut, 'user_project.colour_inst.paint_enable') or 0
         dut._log.info(f"  After fix: paint_enable={paint_enable}")
     
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # CRITICAL FIX: Correct direction mapping based on Verilog bit concatenation analysis
     # dir_udlr = {gp_up, gp_down, gp_left, gp_right} creates:
@@ -556,12 +794,11 @@ async def test_debug_demo(dut):
         Each button press moves exactly 1 pixel.
         """
         pixels = 0
-        painted_pixels = set()
+        _seen.fill(False)
         actual_dir = DIRECTION_MAP.get(direction, direction)
         
-        # Get brush settings once
-        brush_size = read_signal(dut, 'user_project.brush_inst.brush_size') or 0
-        symmetry_mode = read_signal(dut, 'user_project.brush_inst.symmetry_mode') or 0
+        # Get brush settings once (cached until a brush button is pressed)
+        brush_size, symmetry_mode = get_brush_settings(dut)
         brush_pixels = (brush_size + 1) ** 2
         sym_mult = 1 if symmetry_mode == 0 else (2 if symmetry_mode < 3 else 4)
         
@@ -569,52 +806,47 @@ async def test_debug_demo(dut):
         wait_cycles = brush_pixels * sym_mult + 5
         
         # Log initial state
-        if steps > 0:
+        verbose = dut._log.isEnabledFor(logging.INFO)
+        if steps > 0 and verbose:
             start_x = read_signal(dut, 'user_project.pos_inst.x_pos') or 0
             start_y = read_signal(dut, 'user_project.pos_inst.y_pos') or 0
-            dut._log.info(f"move_continuous: {direction} {steps} steps from ({start_x},{start_y})")
+            dut._log.info("move_continuous: %s %d steps from (%d,%d)", direction, steps, start_x, start_y)
         
+        # Stimulus only: pkt_monitor collects the pixels while capture is enabled
+        packed = pkt_capture['packed']
+        pkt_capture['enabled'] = True
         for step in range(steps):
-            # Release -> Press -> collect pixels -> Release
+            # Release -> Press -> wait for packets -> Release
             await send_buttons(dut, {})
             await ClockCycles(dut.clk, 1)
             
             await send_buttons(dut, {actual_dir: 1})
+            await ClockCycles(dut.clk, wait_cycles)
             
-            # Collect pixels during wait
-            for _ in range(wait_cycles):
-                pkt_valid = read_signal(dut, 'user_project.pkt_inst.valid')
-                if pkt_valid:
-                    pkt_x = read_signal(dut, 'user_project.pkt_inst.x_out')
-                    pkt_y = read_signal(dut, 'user_project.pkt_inst.y_out')
-                    colour = read_signal(dut, 'user_project.colour_inst.colour_out')
-                    if pkt_x is not None and pkt_y is not None and colour is not None:
-                        pixel_key = (pkt_x, pkt_y)
-                        if pixel_key not in painted_pixels and 0 <= pkt_x < 256 and 0 <= pkt_y < 256:
-                            painted_pixels.add(pixel_key)
-                            pygame_state['update_queue'].put({
-                                'type': 'pixel', 'x': pkt_x, 'y': pkt_y, 'color': colour
-                            })
-                            pixels += 1
-                await ClockCycles(dut.clk, 1)
+            # Ship this step's pixels as one bulk update
+            pixels += len(packed)
+            post_pixels(packed)
+            packed.clear()
             
             await send_buttons(dut, {})
             await ClockCycles(dut.clk, 1)
             
             # Log first step
-            if step == 0:
+            if step == 0 and verbose:
                 new_x = read_signal(dut, 'user_project.pos_inst.x_pos') or 0
                 new_y = read_signal(dut, 'user_project.pos_inst.y_pos') or 0
-                dut._log.info(f"  Step 0: moved to ({new_x},{new_y})")
+                dut._log.info("  Step 0: moved to (%d,%d)", new_x, new_y)
+        # Packets that landed during the final release frame
+        pixels += len(packed)
+        post_pixels(packed)
+        packed.clear()
+        pkt_capture['enabled'] = False
         
         # Update cursor
         x_pos = read_signal(dut, 'user_project.pos_inst.x_pos')
         y_pos = read_signal(dut, 'user_project.pos_inst.y_pos')
         if x_pos is not None and y_pos is not None:
-            pygame_state['update_queue'].put({
-                'type': 'state',
-                'data': {'cursor_x': x_pos, 'cursor_y': y_pos}
-            })
+            post_update(('state', {'cursor_x': x_pos, 'cursor_y': y_pos}))
         
         return pixels
     
@@ -641,7 +873,8 @@ async def test_debug_demo(dut):
         current_g = read_signal(dut, 'user_project.sw_green') or 0
         current_b = read_signal(dut, 'user_project.sw_blue') or 0
         
-        dut._log.info(f"set_color({color_name}): current=({current_r},{current_g},{current_b}), target=({target_r},{target_g},{target_b})")
+        dut._log.info("set_color(%s): current=(%d,%d,%d), target=(%d,%d,%d)",
+                      color_name, current_r, current_g, current_b, target_r, target_g, target_b)
         
         # Toggle only what's different
         if current_r != target_r:
@@ -661,21 +894,22 @@ async def test_debug_demo(dut):
         final_b = read_signal(dut, 'user_project.sw_blue') or 0
         
         if (final_r, final_g, final_b) != (target_r, target_g, target_b):
-            dut._log.warning(f"Color mismatch! Got ({final_r},{final_g},{final_b}), expected ({target_r},{target_g},{target_b})")
+            dut._log.warning("Color mismatch! Got (%d,%d,%d), expected (%d,%d,%d)",
+                             final_r, final_g, final_b, target_r, target_g, target_b)
         else:
-            dut._log.info(f"Color set correctly: {color_name} ({final_r},{final_g},{final_b})")
+            dut._log.info("Color set correctly: %s (%d,%d,%d)", color_name, final_r, final_g, final_b)
         
-        await update_pygame_state(dut)
+        update_pygame_state(dut)
     
     async def move_quick(dut, direction, steps):
         """ULTRA-FAST move without painting (for repositioning)."""
         actual_dir = DIRECTION_MAP.get(direction, direction)
         
+        # position.v only moves on a direction's rising edge (no auto-repeat), so every
+        # step still needs a release/press frame pair; the settle cycle rides on the latch
         for _ in range(steps):
-            await send_buttons(dut, {})
-            await ClockCycles(dut.clk, 1)
-            await send_buttons(dut, {actual_dir: 1})
-            await ClockCycles(dut.clk, 1)
+            await send_buttons(dut, {}, hold=1)
+            await send_buttons(dut, {actual_dir: 1}, hold=1)
         
         await send_buttons(dut, {})
         
@@ -683,10 +917,7 @@ async def test_debug_demo(dut):
         x_pos = read_signal(dut, 'user_project.pos_inst.x_pos')
         y_pos = read_signal(dut, 'user_project.pos_inst.y_pos')
         if x_pos is not None and y_pos is not None:
-            pygame_state['update_queue'].put({
-                'type': 'state',
-                'data': {'cursor_x': x_pos, 'cursor_y': y_pos}
-            })
+            post_update(('state', {'cursor_x': x_pos, 'cursor_y': y_pos}))
     
     # Move to center-left for square
     dut._log.info("Moving to square position...")
@@ -699,11 +930,11 @@ async def test_debug_demo(dut):
     pixels_drawn += await move_continuous(dut, 'down', 15)
     pixels_drawn += await move_continuous(dut, 'left', 15)
     pixels_drawn += await move_continuous(dut, 'up', 15)
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     dut._log.info(f"\nMovement test complete. Total pixels drawn: {pixels_drawn}")
     pygame_state['status_message'] = f"TEST 2: Square drawn"
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     await ClockCycles(dut.clk, 10)
     
     if pixels_drawn == 0:
@@ -753,7 +984,7 @@ async def test_debug_demo(dut):
             await move_quick(dut, 'left', current_x - start_x)
     
     pygame_state['status_message'] = "TEST 3: Rainbow complete!"
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # =========================================================================
     # Test 4: Brush Sizes
@@ -766,7 +997,7 @@ async def test_debug_demo(dut):
     # Reset brush size
     for _ in range(8):
         await press_button_with_edge(dut, {'l': 1})
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # Move to brush test area
     await move_quick(dut, 'left', 70)
@@ -776,7 +1007,7 @@ async def test_debug_demo(dut):
     for size in range(3):
         for _ in range(size):
             await press_button_with_edge(dut, {'r': 1})
-        await update_pygame_state(dut)
+        update_pygame_state(dut)
         
         pixels_drawn += await move_continuous(dut, 'up', 12)
         await move_quick(dut, 'right', 8)
@@ -784,10 +1015,10 @@ async def test_debug_demo(dut):
         
         for _ in range(size + 1):
             await press_button_with_edge(dut, {'l': 1})
-        await update_pygame_state(dut)
+        update_pygame_state(dut)
     
     pygame_state['status_message'] = "TEST 4: Brush sizes tested"
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # =========================================================================
     # Test 5: Symmetry Modes
@@ -799,7 +1030,7 @@ async def test_debug_demo(dut):
     
     # Set brush size 2
     await press_button_with_edge(dut, {'r': 1})
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # Move to symmetry test area
     await move_quick(dut, 'right', 50)
@@ -808,29 +1039,29 @@ async def test_debug_demo(dut):
     # H-Mirror (Red)
     await set_color(dut, 'Red')
     await press_button_with_edge(dut, {'start': 1})  # H-Mirror
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     pixels_drawn += await move_continuous(dut, 'right', 15)
     
     # V-Mirror (Green)
     await set_color(dut, 'Green')
     await press_button_with_edge(dut, {'start': 1})  # V-Mirror
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     pixels_drawn += await move_continuous(dut, 'down', 15)
     
     # 4-Way (Blue)
     await set_color(dut, 'Blue')
     await press_button_with_edge(dut, {'start': 1})  # 4-Way
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     for _ in range(10):
         pixels_drawn += await move_continuous(dut, 'right', 1)
         pixels_drawn += await move_continuous(dut, 'down', 1)
     
     # Reset symmetry
     await press_button_with_edge(dut, {'start': 1})
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     pygame_state['status_message'] = "TEST 5: Symmetry tested"
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # =========================================================================
     # Test 6: Fill Rectangle
@@ -859,36 +1090,25 @@ async def test_debug_demo(dut):
     await move_quick(dut, 'right', 15)
     await move_quick(dut, 'down', 15)
     
-    # Set corner B
+    # Set corner B, collecting fill pixels in the background from the moment it is pressed
+    packed = []
+    monitor = cocotb.start_soon(capture_pixels(
+        dut, 'user_project.fill_draw_inst', 'user_project.colour_inst.colour_out', packed))
     await press_button_with_edge(dut, {'b': 1})
     
-    # Collect fill pixels
-    fill_pixels = 0
-    for _ in range(500):  # Max wait
-        try:
-            fill_busy = int(dut.user_project.fill_draw_inst.busy.value)
-            fill_valid = int(dut.user_project.fill_draw_inst.pixel_valid.value)
-            if fill_valid:
-                fill_x = int(dut.user_project.fill_draw_inst.x_out.value)
-                fill_y = int(dut.user_project.fill_draw_inst.y_out.value)
-                colour = read_signal(dut, 'user_project.colour_inst.colour_out') or 0
-                if 0 <= fill_x < 256 and 0 <= fill_y < 256:
-                    pygame_state['update_queue'].put({
-                        'type': 'pixel', 'x': fill_x, 'y': fill_y, 'color': colour
-                    })
-                    fill_pixels += 1
-                    pixels_drawn += 1
-            if not fill_busy:
-                break
-        except:
-            break
-        await ClockCycles(dut.clk, 1)
+    fill_busy_h = get_handle(dut, 'user_project.fill_draw_inst.busy')
+    if fill_busy_h is not None and int(fill_busy_h.value):
+        await First(FallingEdge(fill_busy_h), ClockCycles(dut.clk, 500))  # Max wait
+    monitor.kill()
+    post_pixels(packed)
+    fill_pixels = len(packed)
+    pixels_drawn += fill_pixels
     
     # Fill mode off
     await press_button_with_edge(dut, {'select': 1})
     
     pygame_state['status_message'] = f"TEST 6: Fill ({fill_pixels} px)"
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # =========================================================================
     # Test 7: Undo/Redo
@@ -904,50 +1124,36 @@ async def test_debug_demo(dut):
     
     # Set Cyan
     await set_color(dut, 'Cyan')
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # Draw something
     pixels_drawn += await move_continuous(dut, 'right', 10)
     pixels_drawn += await move_continuous(dut, 'down', 10)
     
     # Undo (L+R)
+    packed = []
+    monitor = cocotb.start_soon(capture_pixels(
+        dut, 'user_project.undo_inst', 'user_project.undo_inst.color_out', packed))
     await send_buttons(dut, {'l': 1, 'r': 1})
     await ClockCycles(dut.clk, 5)
     await send_buttons(dut, {})
-    
-    for _ in range(50):
-        try:
-            undo_valid = int(dut.user_project.undo_inst.restore_valid.value)
-            if undo_valid:
-                ux = int(dut.user_project.undo_inst.x_out.value)
-                uy = int(dut.user_project.undo_inst.y_out.value)
-                uc = int(dut.user_project.undo_inst.color_out.value)
-                if 0 <= ux < 256 and 0 <= uy < 256:
-                    pygame_state['update_queue'].put({'type': 'pixel', 'x': ux, 'y': uy, 'color': uc})
-        except:
-            pass
-        await ClockCycles(dut.clk, 1)
+    await ClockCycles(dut.clk, 50)
+    monitor.kill()
+    post_pixels(packed)
     
     # Redo (Select+Start)
+    packed = []
+    monitor = cocotb.start_soon(capture_pixels(
+        dut, 'user_project.undo_inst', 'user_project.undo_inst.color_out', packed))
     await send_buttons(dut, {'select': 1, 'start': 1})
     await ClockCycles(dut.clk, 5)
     await send_buttons(dut, {})
-    
-    for _ in range(50):
-        try:
-            undo_valid = int(dut.user_project.undo_inst.restore_valid.value)
-            if undo_valid:
-                ux = int(dut.user_project.undo_inst.x_out.value)
-                uy = int(dut.user_project.undo_inst.y_out.value)
-                uc = int(dut.user_project.undo_inst.color_out.value)
-                if 0 <= ux < 256 and 0 <= uy < 256:
-                    pygame_state['update_queue'].put({'type': 'pixel', 'x': ux, 'y': uy, 'color': uc})
-        except:
-            pass
-        await ClockCycles(dut.clk, 1)
+    await ClockCycles(dut.clk, 50)
+    monitor.kill()
+    post_pixels(packed)
     
     pygame_state['status_message'] = "TEST 7: Undo/Redo tested"
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # =========================================================================
     # Test 8: Verify gamepad
@@ -963,7 +1169,7 @@ async def test_debug_demo(dut):
     await send_buttons(dut, {})
     
     pygame_state['status_message'] = "TEST 8: Gamepad OK"
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
     # =========================================================================
     # Complete
@@ -972,12 +1178,15 @@ async def test_debug_demo(dut):
     dut._log.info("All tests complete!")
     dut._log.info("="*60)
     pygame_state['status_message'] = "✅ All tests complete!"
-    await update_pygame_state(dut)
+    update_pygame_state(dut)
     
-    # Wait 2 seconds
-    dut._log.info("Waiting 2 seconds...")
-    await ClockCycles(dut.clk, 100000000)  # 2 sec at 50MHz
+    # Keep the final frame on screen for 2 wall-clock seconds. Simulated time
+    # isn't needed here, and simulating 2s of a 50MHz clock costs 100M cycles.
+    if PYGAME_AVAILABLE:
+        dut._log.info("Waiting 2 seconds...")
+        time.sleep(2.0)
     
+    pkt_task.kill()
     pygame_state['running'] = False
     pg_thread.join(timeout=1.0)
     
@@ -5,24 +5,75 @@ Supports: Brush Size, Symmetry, Fill Rectangle, Undo/Redo
 """
 
 import pygame
+import numpy as np
 import sys
 import os
+from functools import lru_cache
 
-COLORS = {
-    0b000: (0, 0, 0), 0b001: (0, 0, 255), 0b010: (0, 255, 0), 0b011: (0, 255, 255),
-    0b100: (255, 0, 0), 0b101: (255, 0, 255), 0b110: (255, 255, 0), 0b111: (255, 255, 255),
-}
-COLOR_NAMES = {
-    0b000: "Black", 0b001: "Blue", 0b010: "Green", 0b011: "Cyan",
-    0b100: "Red", 0b101: "Magenta", 0b110: "Yellow", 0b111: "White"
-}
-SYMMETRY_MODES = ["Off", "H-Mirror", "V-Mirror", "4-Way"]
+# Indexed by the 3-bit RGB colour value
+COLORS = (
+    (0, 0, 0), (0, 0, 255), (0, 255, 0), (0, 255, 255),
+    (255, 0, 0), (255, 0, 255), (255, 255, 0), (255, 255, 255),
+)
+COLOR_NAMES = ("Black", "Blue", "Green", "Cyan", "Red", "Magenta", "Yellow", "White")
+SYMMETRY_MODES = ("Off", "H-Mirror", "V-Mirror", "4-Way")
+# Fires every move_delay ms; each tick steps the cursor once if an arrow is held
+CURSOR_MOVE_EVENT = pygame.USEREVENT + 1
+# Switch indicator fill colour per RGB switch when it is on
+SWITCH_COLORS = (("R", (255, 60, 60)), ("G", (60, 255, 60)), ("B", (60, 60, 255)))
+# Held arrow keys in priority order, and the single-axis step each one makes
+MOVE_KEYS = ((pygame.K_UP, 'up'), (pygame.K_DOWN, 'down'), (pygame.K_LEFT, 'left'), (pygame.K_RIGHT, 'right'))
+DIRECTION_KEYS = frozenset(key for key, _ in MOVE_KEYS)
+DIRECTION_STEPS = {'up': (0, 1), 'down': (0, -1), 'left': (-1, 0), 'right': (1, 0)}
+# Sidebar strings that only depend on small enumerations, formatted once
+BRUSH_LABELS = tuple(f"Brush: {n}x{n}" for n in range(1, 9))  # brush_size is 3 bits
+SYMMETRY_LABELS = tuple(f"Symmetry: {mode}" for mode in SYMMETRY_MODES)
+# I2C byte readouts, one preformatted string per possible byte value
+I2C_X_LABELS = tuple(f"X: 0x{v:02X}" for v in range(256))
+I2C_Y_LABELS = tuple(f"Y: 0x{v:02X}" for v in range(256))
+I2C_STATUS_LABELS = tuple(f"Status: 0x{v:02X}" for v in range(256))
+CONTROLS = ("Arrows = Move", "A/X/Y = Colors", "B = Fill corner (fill mode)",
+            "Tab = Toggle fill mode", "+/- = Brush size", "Shift+S = Symmetry",
+            "Z = Undo, Y = Redo", "C = Clear")
+
+
+@lru_cache(maxsize=8)
+def brush_offsets(brush_size):
+    """Flattened (dx, dy) offsets of a (brush_size + 1)^2 brush from its top-left cell."""
+    dx, dy = np.meshgrid(np.arange(brush_size + 1), np.arange(brush_size + 1))
+    return dx.ravel(), dy.ravel()
+
+
+# Copies painted per symmetry mode as (mirror x, mirror y), in apply_symmetry's order
+SYMMETRY_COPIES = (((0, 0),), ((0, 0), (1, 0)), ((0, 0), (0, 1)),
+                   ((0, 0), (1, 0), (0, 1), (1, 1)))
+
+
+@lru_cache(maxsize=32)
+def stamp_offsets(brush_size, symmetry_mode):
+    """Brush offsets with every symmetry copy folded in: a stamp whose brush box starts
+    at (x0, y0) covers sign_x * x0 + off_x, sign_y * y0 + off_y (255 - v for mirrors)."""
+    dx, dy = brush_offsets(brush_size)
+    copies = SYMMETRY_COPIES[symmetry_mode]
+    sign_x = np.concatenate([np.full(dx.size, -1 if mx else 1) for mx, _ in copies])
+    sign_y = np.concatenate([np.full(dy.size, -1 if my else 1) for _, my in copies])
+    off_x = np.concatenate([255 - dx if mx else dx for mx, _ in copies])
+    off_y = np.concatenate([255 - dy if my else dy for _, my in copies])
+    return sign_x, off_x, sign_y, off_y
 
 
 class TinyCanvas:
+    __slots__ = ('grid_size', 'canvas', 'dirty', 'dirty_box', 'cursor_x', 'cursor_y',
+                 'sw_red', 'sw_green', 'sw_blue', 'brush_mode', 'brush_size', 'symmetry_mode',
+                 'fill_mode', 'fill_corner_a', 'undo_buffer', 'redo_buffer', 'current_stroke',
+                 'max_undo', 'i2c_x', 'i2c_y', 'i2c_status', 'i2c_count',
+                 'move_delay')
+    
     def __init__(self):
         self.grid_size = 256
-        self.canvas = [[0 for _ in range(self.grid_size)] for _ in range(self.grid_size)]
+        self.canvas = np.zeros((self.grid_size, self.grid_size), dtype=np.uint8)  # [y, x]
+        self.dirty = True  # whole canvas must be recopied to the display
+        self.dirty_box = None  # [xmin, ymin, xmax, ymax] painted since the last copy
         
         self.cursor_x = 128
         self.cursor_y = 128
@@ -47,57 +98,80 @@ class TinyCanvas:
         self.i2c_status = 0
         self.i2c_count = 0
         
-        self.last_move_time = 0
-        self.move_delay = 50
+        self.move_delay = 50  # ms between repeated steps while an arrow is held
     
     def get_color_mix(self):
-        if self.brush_mode:
-            return (int(self.sw_red) << 2) | (int(self.sw_green) << 1) | int(self.sw_blue)
-        return 0
+        # Bools shift as 0/1; -brush_mode is an all-ones mask in brush mode and 0 for the eraser
+        return ((self.sw_red << 2) | (self.sw_green << 1) | self.sw_blue) & -self.brush_mode
     
-    def should_paint(self):
-        if self.brush_mode:
-            return self.sw_red or self.sw_green or self.sw_blue
-        return True
+    def paint_color(self):
+        """Colour a stamp paints right now, or None in brush mode with every switch off."""
+        color = self.get_color_mix()
+        if self.brush_mode and not color:
+            return None
+        return color
     
-    def get_status(self):
-        return (int(self.brush_mode) << 3) | self.get_color_mix()
+    def get_status(self, color=None):
+        if color is None:
+            color = self.get_color_mix()
+        return (self.brush_mode << 3) | color
     
-    def expand_brush(self, x, y):
-        pixels = []
+    def stamp(self, x, y):
+        """Brush footprint around (x, y) plus its symmetry copies as (xs, ys) arrays,
+        clipped to the canvas."""
         half = self.brush_size // 2
-        for dy in range(self.brush_size + 1):
-            for dx in range(self.brush_size + 1):
-                px, py = x + dx - half, y + dy - half
-                if 0 <= px < 256 and 0 <= py < 256:
-                    pixels.append((px, py))
-        return pixels
-    
-    def apply_symmetry(self, pixels):
-        result = list(pixels)
+        x0, y0 = x - half, y - half
+        sign_x, off_x, sign_y, off_y = stamp_offsets(self.brush_size, self.symmetry_mode)
+        xs, ys = sign_x * x0 + off_x, sign_y * y0 + off_y
+        # A mirror copy is off-canvas exactly when its source pixel is
+        if x0 < 0 or y0 < 0 or x0 + self.brush_size > 255 or y0 + self.brush_size > 255:
+            inside = (xs >= 0) & (xs < 256) & (ys >= 0) & (ys < 256)
+            xs, ys = xs[inside], ys[inside]
+        return xs, ys
+    
+    def footprint(self, x0, y0, x1, y1):
+        """Every pixel of the inclusive box (x0, y0)-(x1, y1) inside the canvas, as (xs, ys) arrays."""
+        xs = np.arange(max(x0, 0), min(x1, 255) + 1)
+        ys = np.arange(max(y0, 0), min(y1, 255) + 1)
+        grid_x, grid_y = np.meshgrid(xs, ys)
+        return grid_x.ravel(), grid_y.ravel()
+    
+    def apply_symmetry(self, xs, ys):
+        """Append the mirrored copies of (xs, ys). Copies can overlap on the mirror axes;
+        paint_pixels drops the repeats."""
         if self.symmetry_mode == 1:
-            for x, y in pixels:
-                if 0 <= 255 - x < 256:
-                    result.append((255 - x, y))
-        elif self.symmetry_mode == 2:
-            for x, y in pixels:
-                if 0 <= 255 - y < 256:
-                    result.append((x, 255 - y))
-        elif self.symmetry_mode == 3:
-            for x, y in pixels:
-                result.append((255 - x, y))
-                result.append((x, 255 - y))
-                result.append((255 - x, 255 - y))
-        return list(set(result))
-    
-    def paint_pixels(self, pixels, color):
-        for x, y in pixels:
-            if 0 <= x < 256 and 0 <= y < 256:
-                old_color = self.canvas[y][x]
-                if old_color != color:
-                    self.current_stroke.append((x, y, old_color, color))
-                    self.canvas[y][x] = color
-        self.i2c_count += len(pixels)
+            return np.concatenate((xs, 255 - xs)), np.concatenate((ys, ys))
+        if self.symmetry_mode == 2:
+            return np.concatenate((xs, xs)), np.concatenate((ys, 255 - ys))
+        if self.symmetry_mode == 3:
+            return (np.concatenate((xs, 255 - xs, xs, 255 - xs)),
+                    np.concatenate((ys, ys, 255 - ys, 255 - ys)))
+        return xs, ys
+    
+    def paint_pixels(self, xs, ys, color):
+        if self.symmetry_mode:
+            # Record and count each pixel once, even where mirror copies overlap
+            _, first = np.unique(ys * 256 + xs, return_index=True)
+            xs, ys = xs[first], ys[first]
+        old = self.canvas[ys, xs]
+        changed = old != color
+        if changed.any():
+            cx, cy = xs[changed], ys[changed]
+            self.current_stroke.extend(zip(cx.tolist(), cy.tolist(), old[changed].tolist(),
+                                           [color] * len(cx)))
+            self.canvas[cy, cx] = color
+            self.mark_dirty(int(cx.min()), int(cy.min()), int(cx.max()), int(cy.max()))
+        self.i2c_count += len(xs)
+    
+    def mark_dirty(self, xmin, ymin, xmax, ymax):
+        box = self.dirty_box
+        if box is None:
+            self.dirty_box = [xmin, ymin, xmax, ymax]
+        else:
+            box[0] = min(box[0], xmin)
+            box[1] = min(box[1], ymin)
+            box[2] = max(box[2], xmax)
+            box[3] = max(box[3], ymax)
     
     def start_stroke(self):
         self.current_stroke = []
@@ -111,15 +185,14 @@ class TinyCanvas:
         self.current_stroke = []
     
     def paint_at(self, x, y):
-        if not self.should_paint():
+        color = self.paint_color()
+        if color is None:
             return
-        color = self.get_color_mix()
-        pixels = self.expand_brush(x, y)
-        pixels = self.apply_symmetry(pixels)
-        self.paint_pixels(pixels, color)
+        xs, ys = self.stamp(x, y)
+        self.paint_pixels(xs, ys, color)
         self.i2c_x = x
         self.i2c_y = y
-        self.i2c_status = self.get_status()
+        self.i2c_status = self.get_status(color)
     
     def fill_rect(self, x0, y0, x1, y1):
         """Fill a rectangular region."""
@@ -129,19 +202,17 @@ class TinyCanvas:
         min_x, max_x = min(x0, x1), max(x0, x1)
         min_y, max_y = min(y0, y1), max(y0, y1)
         
-        pixels = []
-        for y in range(min_y, max_y + 1):
-            for x in range(min_x, max_x + 1):
-                expanded = self.expand_brush(x, y)
-                pixels.extend(expanded)
-        
-        pixels = self.apply_symmetry(list(set(pixels)))
-        self.paint_pixels(pixels, color)
+        # The brush swept over the rectangle covers the rectangle grown by the brush box
+        half = self.brush_size // 2
+        xs, ys = self.footprint(min_x - half, min_y - half,
+                                max_x - half + self.brush_size, max_y - half + self.brush_size)
+        xs, ys = self.apply_symmetry(xs, ys)
+        self.paint_pixels(xs, ys, color)
         self.end_stroke()
         
         self.i2c_x = x1
         self.i2c_y = y1
-        self.i2c_status = self.get_status()
+        self.i2c_status = self.get_status(color)
         return (max_x - min_x + 1) * (max_y - min_y + 1)
     
     def set_fill_corner(self):
@@ -160,7 +231,8 @@ class TinyCanvas:
         if self.undo_buffer:
             stroke = self.undo_buffer.pop()
             for x, y, old_color, new_color in stroke:
-                self.canvas[y][x] = old_color
+                self.canvas[y, x] = old_color
+            self.dirty = True
             self.redo_buffer.append(stroke)
             return len(stroke)
         return 0
@@ -169,39 +241,28 @@ class TinyCanvas:
         if self.redo_buffer:
             stroke = self.redo_buffer.pop()
             for x, y, old_color, new_color in stroke:
-                self.canvas[y][x] = new_color
+                self.canvas[y, x] = new_color
+            self.dirty = True
             self.undo_buffer.append(stroke)
             return len(stroke)
         return 0
     
-    def update_cursor(self, current_time, direction):
-        if current_time - self.last_move_time < self.move_delay:
-            return False
-        
-        moved = False
-        if direction == 'up' and self.cursor_y < 255:
-            self.cursor_y += 1
-            moved = True
-        elif direction == 'down' and self.cursor_y > 0:
-            self.cursor_y -= 1
-            moved = True
-        elif direction == 'left' and self.cursor_x > 0:
-            self.cursor_x -= 1
-            moved = True
-        elif direction == 'right' and self.cursor_x < 255:
-            self.cursor_x += 1
-            moved = True
-        
-        if moved:
-            self.last_move_time = current_time
-            # Only paint in freehand mode (not fill mode)
-            if not self.fill_mode and self.should_paint():
-                self.paint_at(self.cursor_x, self.cursor_y)
-        
-        return moved
+    def move_cursor(self, direction):
+        dx, dy = DIRECTION_STEPS[direction]
+        x = min(max(self.cursor_x + dx, 0), 255)
+        y = min(max(self.cursor_y + dy, 0), 255)
+        if x == self.cursor_x and y == self.cursor_y:
+            return False  # pinned against the edge
+        
+        self.cursor_x, self.cursor_y = x, y
+        # Only paint in freehand mode (not fill mode)
+        if not self.fill_mode:
+            self.paint_at(x, y)
+        return True
     
     def clear(self):
-        self.canvas = [[0 for _ in range(self.grid_size)] for _ in range(self.grid_size)]
+        self.canvas.fill(0)
+        self.dirty = True
         self.undo_buffer.clear()
         self.redo_buffer.clear()
         self.current_stroke = []
@@ -209,6 +270,16 @@ class TinyCanvas:
 
 
 class CanvasEmulator:
+    __slots__ = ('window_width', 'window_height', 'screen', 'grid_size', 'sidebar_width',
+                 'canvas_surf', 'palette32', 'scaled_surf', 'panel_surf', 'swatches', 'switch_glyphs',
+                 'bg_color', 'panel_color', 'text_color', 'accent_color', 'highlight',
+                 'font_title', 'font_large', 'font_medium', 'font_small', 'fonts',
+                 'render_text', 'legend_surf', 'canvas', 'clock',
+                 'message', 'message_time', 'in_stroke',
+                 'cell_size', 'canvas_width', 'canvas_height', 'canvas_x', 'canvas_y',
+                 'canvas_rect', 'full_redraw', 'overlay_rects', 'message_rect',
+                 'overlay_key', 'sidebar_key')
+    
     def __init__(self):
         pygame.init()
         
@@ -221,25 +292,62 @@ class CanvasEmulator:
         
         self.grid_size = 256
         self.sidebar_width = 380
-        self.recalculate_layout()
-        
         self.bg_color = (25, 28, 38)
         self.panel_color = (35, 40, 52)
         self.text_color = (220, 220, 230)
         self.accent_color = (80, 200, 255)
         self.highlight = (255, 200, 80)
         
+        self.build_surfaces()
+        self.recalculate_layout()
+        
         self.font_title = pygame.font.Font(None, 36)
         self.font_large = pygame.font.Font(None, 28)
         self.font_medium = pygame.font.Font(None, 22)
         self.font_small = pygame.font.Font(None, 18)
+        self.fonts = {'title': self.font_title, 'large': self.font_large,
+                      'medium': self.font_medium, 'small': self.font_small}
+        # Rasterize each (size, text, color) once; static labels and legend hit every frame
+        self.render_text = lru_cache(maxsize=256)(self._render_text)
+        self.legend_surf = self.build_legend()
         
         self.canvas = TinyCanvas()
+        pygame.time.set_timer(CURSOR_MOVE_EVENT, self.canvas.move_delay)
         self.clock = pygame.time.Clock()
         self.message = ""
         self.message_time = 0
         self.in_stroke = False
     
+    def display_surface(self, size):
+        """Opaque 32-bit surface, converted to the display format when that is 32-bit too
+        (pixels2d cannot map 24-bit surfaces), so blits to the screen need no conversion."""
+        surf = pygame.Surface(size, depth=32)
+        return surf.convert() if self.screen.get_bitsize() == 32 else surf
+    
+    def build_surfaces(self):
+        """(Re)create the reused surfaces for the current display format."""
+        # Unscaled copy of the canvas; its scaled copy and the panel are sized lazily
+        self.canvas_surf = self.display_surface((self.grid_size, self.grid_size))
+        # Colour index -> packed pixel lookup table, so a canvas refresh is one gather
+        self.palette32 = np.array([self.canvas_surf.map_rgb(rgb) for rgb in COLORS],
+                                  dtype=np.uint32)
+        self.scaled_surf = None
+        self.panel_surf = None
+        # Colour swatch and switch indicators only have a few looks each; draw them once
+        self.swatches = []
+        for rgb in COLORS:
+            surf = self.display_surface((60, 60))
+            surf.fill(rgb)
+            pygame.draw.rect(surf, self.text_color, surf.get_rect(), 2)
+            self.swatches.append(surf)
+        self.switch_glyphs = {}
+        for label, clr in SWITCH_COLORS:
+            for state in (False, True):
+                surf = self.display_surface((50, 22))
+                surf.fill(clr if state else (50, 50, 55))
+                pygame.draw.rect(surf, self.text_color, surf.get_rect(), 1)
+                self.switch_glyphs[label, state] = surf
+    
     def recalculate_layout(self):
         available_w = self.window_width - self.sidebar_width - 60
         available_h = self.window_height - 100
@@ -249,14 +357,31 @@ class CanvasEmulator:
         self.canvas_height = self.cell_size * self.grid_size
         self.canvas_x = (self.window_width - self.sidebar_width - self.canvas_width) // 2
         self.canvas_y = (self.window_height - self.canvas_height) // 2 + 30
+        self.canvas_rect = pygame.Rect(self.canvas_x, self.canvas_y, self.canvas_width, self.canvas_height)
+        # Next frame repaints and flips the whole window; after that only changed rects are pushed
+        self.full_redraw = True
+        self.overlay_rects = []
+        self.message_rect = None
+        self.overlay_key = None
+        self.sidebar_key = None
+    
+    def _render_text(self, size, text, color):
+        return self.fonts[size].render(text, True, color).convert_alpha()
+    
+    def build_legend(self):
+        """Pre-render the static "Controls:" block into one transparent surface."""
+        surf = pygame.Surface((self.sidebar_width - 30, 22 + 17 * len(CONTROLS)), pygame.SRCALPHA).convert_alpha()
+        surf.blit(self._render_text('medium', "Controls:", self.text_color), (0, 0))
+        for i, ctrl in enumerate(CONTROLS):
+            surf.blit(self._render_text('small', ctrl, (140, 140, 150)), (0, 22 + 17 * i))
+        return surf
     
     def show_message(self, msg):
         self.message = msg
         self.message_time = pygame.time.get_ticks()
     
     def handle_events(self):
-        current_time = pygame.time.get_ticks()
-        
+        move_tick = False
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
@@ -264,8 +389,17 @@ class CanvasEmulator:
             if event.type == pygame.VIDEORESIZE:
                 self.window_width, self.window_height = event.w, event.h
                 self.screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                self.build_surfaces()  # the new window may use a different pixel format
                 self.recalculate_layout()
             
+            if event.type == CURSOR_MOVE_EVENT:
+                move_tick = True
+            
+            if event.type == pygame.KEYDOWN and event.key in DIRECTION_KEYS:
+                # Step on the press itself, then repeat a full move_delay later
+                move_tick = True
+                pygame.time.set_timer(CURSOR_MOVE_EVENT, self.canvas.move_delay)
+            
             if event.type == pygame.KEYDOWN:
                 # A = Red, Y = Green, X = Blue, B = Fill corner
                 if event.key == pygame.K_a:
@@ -322,7 +456,8 @@ class CanvasEmulator:
                     return False
         
         keys = pygame.key.get_pressed()
-        any_movement = keys[pygame.K_UP] or keys[pygame.K_DOWN] or keys[pygame.K_LEFT] or keys[pygame.K_RIGHT]
+        direction = next((d for key, d in MOVE_KEYS if keys[key]), None)
+        any_movement = direction is not None
         
         # Stroke tracking only in freehand mode
         if not self.canvas.fill_mode:
@@ -334,37 +469,66 @@ class CanvasEmulator:
                 self.canvas.end_stroke()
                 self.in_stroke = False
         
-        if keys[pygame.K_UP]:
-            self.canvas.update_cursor(current_time, 'up')
-        elif keys[pygame.K_DOWN]:
-            self.canvas.update_cursor(current_time, 'down')
-        elif keys[pygame.K_LEFT]:
-            self.canvas.update_cursor(current_time, 'left')
-        elif keys[pygame.K_RIGHT]:
-            self.canvas.update_cursor(current_time, 'right')
+        if direction and move_tick:
+            self.canvas.move_cursor(direction)
         
         return True
     
     def draw_header(self):
-        title = self.font_title.render("TINY CANVAS EMULATOR", True, self.accent_color)
+        title = self.render_text('title', "TINY CANVAS EMULATOR", self.accent_color)
         self.screen.blit(title, (self.window_width // 2 - title.get_width() // 2, 15))
         
         hint = "Arrows:Move | A/X/Y:Color | B:Fill Corner | Tab:Fill Mode | Shift+S:Sym | +/-:Size | Z:Undo"
-        self.screen.blit(self.font_small.render(hint, True, (120, 120, 130)),
+        self.screen.blit(self.render_text('small', hint, (120, 120, 130)),
                         (self.window_width // 2 - 300, 45))
     
     def draw_canvas(self):
-        for cy in range(self.grid_size):
-            for cx in range(self.grid_size):
-                screen_y = self.grid_size - 1 - cy
-                rect = pygame.Rect(self.canvas_x + cx * self.cell_size,
-                                  self.canvas_y + screen_y * self.cell_size,
-                                  self.cell_size, self.cell_size)
-                pygame.draw.rect(self.screen, COLORS[self.canvas.canvas[cy][cx]], rect)
-        
-        pygame.draw.rect(self.screen, (80, 80, 90),
-                        (self.canvas_x - 2, self.canvas_y - 2,
-                         self.canvas_width + 4, self.canvas_height + 4), 2)
+        # Palette lookup written straight into the pixels (row 0 at the bottom), rescaled into a reused surface
+        size = (self.canvas_width, self.canvas_height)
+        if self.scaled_surf is None or self.scaled_surf.get_size() != size:
+            self.scaled_surf = self.display_surface(size)
+            self.canvas.dirty = True
+        canvas = self.canvas
+        overlay_key = (canvas.cursor_x, canvas.cursor_y, canvas.brush_size,
+                       canvas.fill_mode, canvas.fill_corner_a)
+        if not (self.full_redraw or canvas.dirty or canvas.dirty_box or overlay_key != self.overlay_key):
+            return []
+        self.overlay_key = overlay_key
+        # Screen areas to recopy from scaled_surf: repainted pixels plus last frame's overlays
+        damage = list(self.overlay_rects)
+        if self.canvas.dirty or self.full_redraw:
+            damage = [self.canvas_rect]
+        if self.canvas.dirty:
+            px = pygame.surfarray.pixels2d(self.canvas_surf)  # indexed (x, y)
+            px[:] = self.palette32[self.canvas.canvas[::-1].T]
+            del px  # unlock before scaling
+            pygame.transform.scale(self.canvas_surf, size, self.scaled_surf)
+        elif self.canvas.dirty_box:
+            # Only the painted box: recopy it and rescale it in place
+            x0, y0, x1, y1 = self.canvas.dirty_box
+            src = pygame.Rect(x0, self.grid_size - 1 - y1, x1 - x0 + 1, y1 - y0 + 1)
+            px = pygame.surfarray.pixels2d(self.canvas_surf)
+            px[src.left:src.right, src.top:src.bottom] = \
+                self.palette32[self.canvas.canvas[y0:y1 + 1, x0:x1 + 1][::-1].T]
+            del px
+            sub = self.canvas_surf.subsurface(src)
+            c = self.cell_size
+            dst = pygame.Rect(src.x * c, src.y * c, src.w * c, src.h * c)
+            pygame.transform.scale(sub, dst.size, self.scaled_surf.subsurface(dst))
+            damage.append(dst.move(self.canvas_x, self.canvas_y))
+        self.canvas.dirty = False
+        self.canvas.dirty_box = None
+        for rect in damage:
+            self.screen.blit(self.scaled_surf, rect, rect.move(-self.canvas_x, -self.canvas_y))
+        
+        if self.full_redraw:
+            pygame.draw.rect(self.screen, (80, 80, 90),
+                            (self.canvas_x - 2, self.canvas_y - 2,
+                             self.canvas_width + 4, self.canvas_height + 4), 2)
+        
+        # Overlays stay inside the canvas so recopying scaled_surf is enough to erase them
+        self.screen.set_clip(self.canvas_rect)
+        overlays = []
         
         # Cursor
         cursor_size = max(self.cell_size * (self.canvas.brush_size + 2), 8)
@@ -372,8 +536,8 @@ class CanvasEmulator:
         cx = self.canvas_x + self.canvas.cursor_x * self.cell_size + self.cell_size // 2
         cy = self.canvas_y + screen_y * self.cell_size + self.cell_size // 2
         cursor_color = (255, 100, 100) if self.canvas.fill_mode else (255, 255, 0)
-        pygame.draw.rect(self.screen, cursor_color,
-                        (cx - cursor_size // 2, cy - cursor_size // 2, cursor_size, cursor_size), 2)
+        overlays.append(pygame.draw.rect(self.screen, cursor_color,
+                        (cx - cursor_size // 2, cy - cursor_size // 2, cursor_size, cursor_size), 2))
         
         # Fill corner A marker
         if self.canvas.fill_corner_a:
@@ -381,7 +545,7 @@ class CanvasEmulator:
             screen_ay = self.grid_size - 1 - ay
             px = self.canvas_x + ax * self.cell_size + self.cell_size // 2
             py = self.canvas_y + screen_ay * self.cell_size + self.cell_size // 2
-            pygame.draw.circle(self.screen, (255, 100, 100), (px, py), 8, 2)
+            overlays.append(pygame.draw.circle(self.screen, (255, 100, 100), (px, py), 8, 2))
             
             # Preview rectangle
             bx, by = self.canvas.cursor_x, self.canvas.cursor_y
@@ -392,82 +556,108 @@ class CanvasEmulator:
             ry = self.canvas_y + (self.grid_size - 1 - max_y) * self.cell_size
             rw = (max_x - min_x + 1) * self.cell_size
             rh = (max_y - min_y + 1) * self.cell_size
-            pygame.draw.rect(self.screen, (255, 100, 100, 128), (rx, ry, rw, rh), 1)
+            overlays.append(pygame.draw.rect(self.screen, (255, 100, 100, 128), (rx, ry, rw, rh), 1))
+        self.screen.set_clip(None)
+        
+        self.overlay_rects = [r.clip(self.canvas_rect) for r in overlays]
+        return damage + self.overlay_rects
+    
+    def sidebar_state(self):
+        """Everything draw_sidebar shows; the panel is only redrawn when this changes."""
+        c = self.canvas
+        return (c.sw_red, c.sw_green, c.sw_blue, c.brush_mode, c.fill_mode, c.fill_corner_a,
+                c.cursor_x, c.cursor_y, c.brush_size, c.symmetry_mode,
+                len(c.undo_buffer), len(c.redo_buffer),
+                c.i2c_x, c.i2c_y, c.i2c_status, c.i2c_count)
     
     def draw_sidebar(self):
         sx = self.window_width - self.sidebar_width + 15
         y = 70
         
-        pygame.draw.rect(self.screen, self.panel_color,
-                        (sx - 10, y - 10, self.sidebar_width - 20, self.window_height - 90),
-                        border_radius=10)
+        panel = pygame.Rect(sx - 10, y - 10, self.sidebar_width - 20, self.window_height - 90)
+        if self.panel_surf is None or self.panel_surf.get_size() != panel.size:
+            # Rounded panel over the window background, drawn once per layout
+            self.panel_surf = self.display_surface(panel.size)
+            self.panel_surf.fill(self.bg_color)
+            pygame.draw.rect(self.panel_surf, self.panel_color, self.panel_surf.get_rect(), border_radius=10)
+        self.screen.blit(self.panel_surf, panel)
         
+        blits = []
         color = self.canvas.get_color_mix()
-        pygame.draw.rect(self.screen, COLORS[color], (sx, y, 60, 60))
-        pygame.draw.rect(self.screen, self.text_color, (sx, y, 60, 60), 2)
-        
-        self.screen.blit(self.font_large.render(COLOR_NAMES[color], True, self.text_color), (sx + 70, y + 5))
+        blits.append((self.swatches[color], (sx, y)))
+        blits.append((self.render_text('large', COLOR_NAMES[color], self.text_color), (sx + 70, y + 5)))
         
         mode_text = "BRUSH" if self.canvas.brush_mode else "ERASER"
         mode_color = (80, 255, 120) if self.canvas.brush_mode else (255, 100, 100)
-        self.screen.blit(self.font_medium.render(f"Paint: {mode_text}", True, mode_color), (sx + 70, y + 35))
+        blits.append((self.render_text('medium', f"Paint: {mode_text}", mode_color), (sx + 70, y + 35)))
         y += 75
         
         # Fill mode indicator
         fill_text = "FILL MODE ON" if self.canvas.fill_mode else "Fill Mode Off"
         fill_color = (255, 100, 100) if self.canvas.fill_mode else (100, 100, 110)
-        self.screen.blit(self.font_medium.render(fill_text, True, fill_color), (sx, y))
+        blits.append((self.render_text('medium', fill_text, fill_color), (sx, y)))
         y += 25
         
         if self.canvas.fill_mode and self.canvas.fill_corner_a:
             corner_text = f"Corner A: {self.canvas.fill_corner_a}"
-            self.screen.blit(self.font_small.render(corner_text, True, (255, 150, 150)), (sx, y))
+            blits.append((self.render_text('small', corner_text, (255, 150, 150)), (sx, y)))
             y += 20
         y += 5
         
-        for label, state, clr in [("R", self.canvas.sw_red, (255, 60, 60)),
-                                   ("G", self.canvas.sw_green, (60, 255, 60)),
-                                   ("B", self.canvas.sw_blue, (60, 60, 255))]:
-            self.screen.blit(self.font_large.render(label, True, self.text_color), (sx, y))
-            pygame.draw.rect(self.screen, clr if state else (50, 50, 55), (sx + 25, y, 50, 22))
-            pygame.draw.rect(self.screen, self.text_color, (sx + 25, y, 50, 22), 1)
-            self.screen.blit(self.font_small.render("ON" if state else "OFF", True, self.text_color), (sx + 85, y + 3))
+        for label, state in (("R", self.canvas.sw_red), ("G", self.canvas.sw_green), ("B", self.canvas.sw_blue)):
+            blits.append((self.render_text('large', label, self.text_color), (sx, y)))
+            blits.append((self.switch_glyphs[label, state], (sx + 25, y)))
+            blits.append((self.render_text('small', "ON" if state else "OFF", self.text_color), (sx + 85, y + 3)))
             y += 28
         y += 10
         
-        self.screen.blit(self.font_medium.render(f"Position: ({self.canvas.cursor_x}, {self.canvas.cursor_y})", True, self.text_color), (sx, y))
+        blits.append((self.render_text('medium', f"Position: ({self.canvas.cursor_x}, {self.canvas.cursor_y})", self.text_color), (sx, y)))
         y += 25
-        self.screen.blit(self.font_medium.render(f"Brush: {self.canvas.brush_size + 1}x{self.canvas.brush_size + 1}", True, self.text_color), (sx, y))
+        blits.append((self.render_text('medium', BRUSH_LABELS[self.canvas.brush_size], self.text_color), (sx, y)))
         y += 25
-        self.screen.blit(self.font_medium.render(f"Symmetry: {SYMMETRY_MODES[self.canvas.symmetry_mode]}", True, self.text_color), (sx, y))
+        blits.append((self.render_text('medium', SYMMETRY_LABELS[self.canvas.symmetry_mode], self.text_color), (sx, y)))
         y += 30
         
-        self.screen.blit(self.font_small.render(f"Undo: {len(self.canvas.undo_buffer)} | Redo: {len(self.canvas.redo_buffer)}", True, (150, 150, 160)), (sx, y))
+        blits.append((self.render_text('small', f"Undo: {len(self.canvas.undo_buffer)} | Redo: {len(self.canvas.redo_buffer)}", (150, 150, 160)), (sx, y)))
         y += 25
         
-        self.screen.blit(self.font_medium.render("I2C Output:", True, self.accent_color), (sx, y))
+        blits.append((self.render_text('medium', "I2C Output:", self.accent_color), (sx, y)))
         y += 22
-        for info in [f"X: 0x{self.canvas.i2c_x:02X}", f"Y: 0x{self.canvas.i2c_y:02X}",
-                     f"Status: 0x{self.canvas.i2c_status:02X}", f"Packets: {self.canvas.i2c_count}"]:
-            self.screen.blit(self.font_small.render(info, True, (180, 180, 190)), (sx + 10, y))
+        for info in (I2C_X_LABELS[self.canvas.i2c_x], I2C_Y_LABELS[self.canvas.i2c_y],
+                     I2C_STATUS_LABELS[self.canvas.i2c_status], f"Packets: {self.canvas.i2c_count}"):
+            blits.append((self.render_text('small', info, (180, 180, 190)), (sx + 10, y)))
             y += 18
         
         y += 15
-        self.screen.blit(self.font_medium.render("Controls:", True, self.text_color), (sx, y))
-        y += 22
-        for ctrl in ["Arrows = Move", "A/X/Y = Colors", "B = Fill corner (fill mode)",
-                     "Tab = Toggle fill mode", "+/- = Brush size", "Shift+S = Symmetry",
-                     "Z = Undo, Y = Redo", "C = Clear"]:
-            self.screen.blit(self.font_small.render(ctrl, True, (140, 140, 150)), (sx, y))
-            y += 17
+        blits.append((self.legend_surf, (sx, y)))
+        # Nothing in the sidebar overlaps, so it all goes out in one batched call
+        self.screen.blits(blits, doreturn=False)
+        return panel
     
     def draw_message(self):
+        # Erase last frame's box, then draw the current one; both areas need pushing.
+        # Clipped to the canvas column so narrow windows don't cut into the sidebar.
+        rects = []
+        self.screen.set_clip(pygame.Rect(0, 0, self.window_width - self.sidebar_width, self.window_height))
+        if self.message_rect:
+            self.screen.fill(self.bg_color, self.message_rect)
+            rects.append(self.message_rect)
+            self.message_rect = None
         if self.message and pygame.time.get_ticks() - self.message_time < 2000:
-            msg = self.font_large.render(self.message, True, self.highlight)
-            pygame.draw.rect(self.screen, (40, 40, 50),
+            msg = self.render_text('large', self.message, self.highlight)
+            self.message_rect = pygame.draw.rect(self.screen, (40, 40, 50),
                            (self.canvas_x, self.canvas_y + self.canvas_height + 10, msg.get_width() + 20, 30),
                            border_radius=5)
             self.screen.blit(msg, (self.canvas_x + 10, self.canvas_y + self.canvas_height + 15))
+            rects.append(self.message_rect)
+        self.screen.set_clip(None)
+        return rects
+    
+    def needs_flip(self, rects):
+        """Many rects or over half the window: one flip beats per-rect updates."""
+        if len(rects) > 50:
+            return True
+        return sum(r.w * r.h for r in rects) * 2 >= self.window_width * self.window_height
     
     def run(self):
         print("=" * 50)
@@ -480,12 +670,21 @@ class CanvasEmulator:
         running = True
         while running:
             running = self.handle_events()
-            self.screen.fill(self.bg_color)
-            self.draw_header()
-            self.draw_canvas()
-            self.draw_sidebar()
-            self.draw_message()
-            pygame.display.flip()
+            if self.full_redraw:
+                self.screen.fill(self.bg_color)
+                self.draw_header()
+            # Idle frames draw nothing and push nothing; they only wait on the clock
+            dirty_rects = self.draw_canvas()
+            key = self.sidebar_state()
+            if key != self.sidebar_key or self.full_redraw:
+                dirty_rects.append(self.draw_sidebar())
+                self.sidebar_key = key
+            dirty_rects += self.draw_message()
+            if self.full_redraw or self.needs_flip(dirty_rects):
+                pygame.display.flip()
+                self.full_redraw = False
+            elif dirty_rects:
+                pygame.display.update(dirty_rects)
             self.clock.tick(60)
         
         pygame.quit()
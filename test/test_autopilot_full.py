@@ -15,13 +15,13 @@ Output: PASS / FAIL summary
 """
 
 import cocotb
-from cocotb.triggers import RisingEdge, ClockCycles
+from cocotb.triggers import RisingEdge, FallingEdge, ClockCycles, First, ReadOnly
 from cocotb.clock import Clock
 
-# Canvas model: 256x256, initialized black
+# Canvas model: 256x256, initialized black, one byte per pixel at y * CANVAS_W + x
 CANVAS_W = 256
 CANVAS_H = 256
-canvas_model = [[0 for _ in range(CANVAS_W)] for _ in range(CANVAS_H)]
+canvas_model = bytearray(CANVAS_W * CANVAS_H)
 
 # Track painted pixels for undo/redo
 painted_history = []
@@ -34,18 +34,58 @@ def wrap(val):
     return (val + 256) % 256
 
 
+# Resolved signal handles keyed by dotted path, so polling loops skip the getattr walk
+_SIGS = {}
+
+
+def resolve_signal(dut, path):
+    """Resolve a dotted signal path to its handle once (None if it doesn't exist)"""
+    h = _SIGS.get(path)
+    if h is None:
+        try:
+            h = dut
+            for p in path.split('.'):
+                h = getattr(h, p)
+        except AttributeError:
+            return None
+        _SIGS[path] = h
+    return h
+
+
+def read_handle(h):
+    """Read a resolved handle as int, 0 if X/Z"""
+    try:
+        return int(h.value)
+    except ValueError:
+        return 0
+
+
 def read_signal(dut, path):
     """Safely read a signal"""
+    h = resolve_signal(dut, path)
+    if h is None:
+        return None
     try:
-        parts = path.split('.')
-        obj = dut
-        for p in parts:
-            obj = getattr(obj, p)
-        return int(obj.value)
-    except:
+        return int(h.value)
+    except ValueError:
         return None
 
 
+async def collect_pixels(dut, valid_h, x_h, y_h, c_h, pixels):
+    """Monitor task: append (x, y, colour) for every cycle valid is high.
+    Sleeps on RisingEdge(valid) while it is low, so idle cycles cost nothing.
+    Colour is None when c_h is None.
+    """
+    while True:
+        await ReadOnly()
+        if int(valid_h.value):
+            colour = read_handle(c_h) if c_h is not None else None
+            pixels.append((read_handle(x_h), read_handle(y_h), colour))
+            await RisingEdge(dut.clk)
+        else:
+            await RisingEdge(valid_h)
+
+
 async def send_pmod_bit(dut, bit):
     """Send a single bit via PMOD protocol - OPTIMIZED"""
     # Set data bit
@@ -119,7 +159,7 @@ def record_pixel(x, y, brush_size, sym_mode, color):
     def set_pixel(px, py):
         px = wrap(px)
         py = wrap(py)
-        canvas_model[py][px] = color
+        canvas_model[py * CANVAS_W + px] = color
     
     brush = brush_size + 1  # brush_size 0 = 1x1, 1 = 2x2, etc.
     
@@ -142,7 +182,7 @@ def record_pixel(x, y, brush_size, sym_mode, color):
 
 def count_painted_pixels():
     """Count non-black pixels in canvas model"""
-    return sum(sum(1 for p in row if p != 0) for row in canvas_model)
+    return len(canvas_model) - canvas_model.count(0)
 
 
 @cocotb.test()
@@ -343,25 +383,29 @@ async def test_full_validation(dut):
     bx = read_signal(dut, 'user_project.pos_inst.x_pos') or 0
     by = read_signal(dut, 'user_project.pos_inst.y_pos') or 0
     
+    fill_busy_h = resolve_signal(dut, 'user_project.fill_draw_inst.busy')
+    fill_valid_h = resolve_signal(dut, 'user_project.fill_draw_inst.pixel_valid')
+    fill_x_h = resolve_signal(dut, 'user_project.fill_draw_inst.x_out')
+    fill_y_h = resolve_signal(dut, 'user_project.fill_draw_inst.y_out')
+    fill_pixels = 0
+    filled = []
+    # Start collecting before corner B so the fill's first pixels are seen
+    if fill_valid_h is not None:
+        monitor = cocotb.start_soon(collect_pixels(dut, fill_valid_h, fill_x_h, fill_y_h, None, filled))
+    
     # Set corner B (triggers fill)
     await press_button_with_edge(dut, {'b': 1})
     await ClockCycles(dut.clk, 10)
     
     # Wait for fill to complete
-    fill_busy = 1
-    cycles = 0
-    fill_pixels = 0
-    while fill_busy and cycles < 2000:
-        fill_busy = read_signal(dut, 'user_project.fill_draw_inst.busy') or 0
-        fill_valid = read_signal(dut, 'user_project.fill_draw_inst.pixel_valid') or 0
-        if fill_valid:
-            fill_x = read_signal(dut, 'user_project.fill_draw_inst.x_out') or 0
-            fill_y = read_signal(dut, 'user_project.fill_draw_inst.y_out') or 0
+    if fill_valid_h is not None:
+        if fill_busy_h is not None and read_handle(fill_busy_h):
+            await First(FallingEdge(fill_busy_h), ClockCycles(dut.clk, 2000))
+        monitor.kill()
+        for fill_x, fill_y, _ in filled:
             if 0 <= fill_x < 256 and 0 <= fill_y < 256:
-                canvas_model[fill_y][fill_x] = 0b100  # Red
+                canvas_model[fill_y * CANVAS_W + fill_x] = 0b100  # Red
                 fill_pixels += 1
-        await ClockCycles(dut.clk, 1)
-        cycles += 1
     
     assert fill_pixels > 0, f"Fill rectangle failed: fill_pixels={fill_pixels}"
     dut._log.info(f"  ✓ Fill rectangle: {fill_pixels} pixels filled")
@@ -394,53 +438,58 @@ async def test_full_validation(dut):
             pkt_y = read_signal(dut, 'user_project.pkt_inst.y_out') or 0
             colour = read_signal(dut, 'user_project.colour_inst.colour_out') or 0
             if 0 <= pkt_x < 256 and 0 <= pkt_y < 256:
-                canvas_model[pkt_y][pkt_x] = colour
+                canvas_model[pkt_y * CANVAS_W + pkt_x] = colour
         await ClockCycles(dut.clk, 10)
     
     pixels_after_paint = count_painted_pixels()
     assert pixels_after_paint > pixels_before_undo, f"Painting failed: before={pixels_before_undo}, after={pixels_after_paint}"
     dut._log.info(f"  ✓ Painted: {pixels_after_paint - pixels_before_undo} new pixels")
     
+    # restore_valid is a one-cycle pulse on the combo's rising edge, so watch it
+    # from before the press
+    undo_valid_h = resolve_signal(dut, 'user_project.undo_inst.restore_valid')
+    undo_x_h = resolve_signal(dut, 'user_project.undo_inst.x_out')
+    undo_y_h = resolve_signal(dut, 'user_project.undo_inst.y_out')
+    undo_c_h = resolve_signal(dut, 'user_project.undo_inst.color_out')
+    
     # Undo (L+R combo)
+    restored = []
+    if undo_valid_h is not None:
+        monitor = cocotb.start_soon(collect_pixels(dut, undo_valid_h, undo_x_h, undo_y_h, undo_c_h, restored))
     await send_buttons(dut, {'l': 1, 'r': 1})
     await ClockCycles(dut.clk, 10)
     await send_buttons(dut, {})
     await ClockCycles(dut.clk, 10)
+    if undo_valid_h is not None:
+        monitor.kill()
     
-    # Read undo restore pixels
+    # Apply undo restore pixels
     undo_pixels = 0
-    for _ in range(100):
-        undo_valid = read_signal(dut, 'user_project.undo_inst.restore_valid') or 0
-        if undo_valid:
-            ux = read_signal(dut, 'user_project.undo_inst.x_out') or 0
-            uy = read_signal(dut, 'user_project.undo_inst.y_out') or 0
-            uc = read_signal(dut, 'user_project.undo_inst.color_out') or 0
-            if 0 <= ux < 256 and 0 <= uy < 256:
-                canvas_model[uy][ux] = uc  # Restore previous color
-                undo_pixels += 1
-        await ClockCycles(dut.clk, 2)
+    for ux, uy, uc in restored:
+        if 0 <= ux < 256 and 0 <= uy < 256:
+            canvas_model[uy * CANVAS_W + ux] = uc  # Restore previous color
+            undo_pixels += 1
     
     pixels_after_undo = count_painted_pixels()
     dut._log.info(f"  ✓ Undo: restored {undo_pixels} pixels")
     
     # Redo (Select+Start combo)
+    restored = []
+    if undo_valid_h is not None:
+        monitor = cocotb.start_soon(collect_pixels(dut, undo_valid_h, undo_x_h, undo_y_h, undo_c_h, restored))
     await send_buttons(dut, {'select': 1, 'start': 1})
     await ClockCycles(dut.clk, 10)
     await send_buttons(dut, {})
     await ClockCycles(dut.clk, 10)
+    if undo_valid_h is not None:
+        monitor.kill()
     
-    # Read redo restore pixels
+    # Apply redo restore pixels
     redo_pixels = 0
-    for _ in range(100):
-        undo_valid = read_signal(dut, 'user_project.undo_inst.restore_valid') or 0
-        if undo_valid:
-            ux = read_signal(dut, 'user_project.undo_inst.x_out') or 0
-            uy = read_signal(dut, 'user_project.undo_inst.y_out') or 0
-            uc = read_signal(dut, 'user_project.undo_inst.color_out') or 0
-            if 0 <= ux < 256 and 0 <= uy < 256:
-                canvas_model[uy][ux] = uc
-                redo_pixels += 1
-        await ClockCycles(dut.clk, 2)
+    for ux, uy, uc in restored:
+        if 0 <= ux < 256 and 0 <= uy < 256:
+            canvas_model[uy * CANVAS_W + ux] = uc
+            redo_pixels += 1
     
     pixels_after_redo = count_painted_pixels()
     dut._log.info(f"  ✓ Redo: restored {redo_pixels} pixels")
@@ -8,53 +8,102 @@ Tests all features: color mixing, brush size, symmetry, fill rectangle, undo/red
 
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import ClockCycles, Timer, RisingEdge, FallingEdge
+from cocotb.triggers import ClockCycles, Timer, RisingEdge, FallingEdge, Edge, First
 from cocotb.binary import BinaryValue
+from functools import lru_cache
+
+# Button order: B, Y, select, start, up, down, left, right, A, X, L, R (MSB first)
+BUTTON_ORDER = ('b', 'y', 'select', 'start', 'up', 'down', 'left', 'right', 'a', 'x', 'l', 'r')
+
+@lru_cache(maxsize=128)
+def encode_buttons(pressed):
+    """Shift-order bits for a set of pressed buttons"""
+    return sum(1 << (11 - i) for i, btn in enumerate(BUTTON_ORDER) if btn in pressed)
+
+# Value currently driven onto ui_in, so PMOD edges are computed in Python
+# and written as whole bytes without reading the bus back
+_ui_state = 0
+
+def set_ui_in(dut, value):
+    """Drive ui_in and remember the driven value"""
+    global _ui_state
+    _ui_state = value
+    # Synchronized inside the design, so no need to wait for the write phase
+    dut.ui_in.setimmediatevalue(value)
+
+async def clock_edges(dut, n):
+    """Wait n rising edges of clk"""
+    edge = RisingEdge(dut.clk)
+    for _ in range(n):
+        await edge
 
 # Gamepad PMOD simulation helpers
 async def gamepad_pmod_send_bit(dut, data):
     """Send a single bit through the gamepad PMOD interface (data sampled on rising edge of clk)"""
-    dut.ui_in[6].value = data  # pmod_data
-    await ClockCycles(dut.clk, 2)
-    dut.ui_in[5].value = 1  # pmod_clk high
-    await ClockCycles(dut.clk, 3)  # Hold high for sampling
-    dut.ui_in[5].value = 0  # pmod_clk low
-    await ClockCycles(dut.clk, 2)
+    set_ui_in(dut, (_ui_state & ~0x40) | (data << 6))  # pmod_data
+    await clock_edges(dut, 2)
+    set_ui_in(dut, _ui_state | 0x20)  # pmod_clk high
+    await clock_edges(dut, 3)  # Hold high for sampling
+    set_ui_in(dut, _ui_state & ~0x20)  # pmod_clk low
+    await clock_edges(dut, 2)
 
 async def gamepad_pmod_send_buttons(dut, buttons):
     """
     Send button state through gamepad PMOD (12 bits for single controller)
     buttons: dict with keys: b, y, select, start, up, down, left, right, a, x, l, r
     """
-    # Button order: B, Y, select, start, up, down, left, right, A, X, L, R (MSB first)
-    button_order = ['b', 'y', 'select', 'start', 'up', 'down', 'left', 'right', 'a', 'x', 'l', 'r']
+    bits = encode_buttons(frozenset(k for k, v in buttons.items() if v))
     
     # Initialize: data low, clock low, latch low
-    dut.ui_in[6].value = 0  # pmod_data
-    dut.ui_in[5].value = 0  # pmod_clk
-    dut.ui_in[4].value = 0  # pmod_latch
+    set_ui_in(dut, _ui_state & ~0x70)  # pmod_data, pmod_clk, pmod_latch low
     await ClockCycles(dut.clk, 2)
     
     # Send all 12 bits serially (MSB first)
-    for btn in button_order:
-        bit = 1 if buttons.get(btn, 0) else 0
-        await gamepad_pmod_send_bit(dut, bit)
+    for i in range(11, -1, -1):
+        await gamepad_pmod_send_bit(dut, (bits >> i) & 1)
     
     # Latch pulse (high pulse to transfer shift_reg to data_reg)
     await ClockCycles(dut.clk, 2)
-    dut.ui_in[4].value = 1  # pmod_latch high
+    set_ui_in(dut, _ui_state | 0x10)  # pmod_latch high
     await ClockCycles(dut.clk, 5)
-    dut.ui_in[4].value = 0  # pmod_latch low
+    set_ui_in(dut, _ui_state & ~0x10)  # pmod_latch low
     await ClockCycles(dut.clk, 5)
 
+async def wait_buttons_latched(dut, buttons):
+    """Wait until the gamepad driver holds `buttons`, then let the one-register edge detectors see it.
+    Falls back to a fixed 10-cycle wait when the driver's data word isn't visible.
+    """
+    try:
+        data = dut.user_project.gamepad_inst.gamepad_pmod_data
+    except AttributeError:
+        await ClockCycles(dut.clk, 10)
+        return
+    expected = encode_buttons(frozenset(k for k, v in buttons.items() if v))
+    if data.value.is_resolvable and int(data.value) != expected:
+        await First(Edge(data), ClockCycles(dut.clk, 10))
+    await clock_edges(dut, 2)
+
 async def press_button_edge(dut, buttons_before, buttons_after):
     """Simulate button press edge (press and release)"""
     await gamepad_pmod_send_buttons(dut, buttons_before)
-    await ClockCycles(dut.clk, 10)
+    await wait_buttons_latched(dut, buttons_before)
     await gamepad_pmod_send_buttons(dut, buttons_after)
-    await ClockCycles(dut.clk, 10)
+    await wait_buttons_latched(dut, buttons_after)
     await gamepad_pmod_send_buttons(dut, {})  # Release all
-    await ClockCycles(dut.clk, 10)
+    await wait_buttons_latched(dut, {})
+
+async def press_sequence(dut, buttons_list, spacing=10):
+    """Press and release each button set in turn with one `spacing` wait after each.
+    The release frame of one press doubles as the idle frame before the next.
+    """
+    await gamepad_pmod_send_buttons(dut, {})
+    await wait_buttons_latched(dut, {})
+    for buttons in buttons_list:
+        await gamepad_pmod_send_buttons(dut, buttons)
+        await wait_buttons_latched(dut, buttons)
+        await gamepad_pmod_send_buttons(dut, {})
+        await wait_buttons_latched(dut, {})
+        await ClockCycles(dut.clk, spacing)
 
 @cocotb.test()
 async def test_reset(dut):
@@ -63,7 +112,7 @@ async def test_reset(dut):
     
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    set_ui_in(dut, 0)
     dut.uio_in.value = 0
     await ClockCycles(dut.clk, 5)
     
@@ -80,7 +129,7 @@ async def test_color_mixing(dut):
     # Reset
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    set_ui_in(dut, 0)
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await ClockCycles(dut.clk, 10)
@@ -103,12 +152,7 @@ async def test_color_mixing(dut):
     
     # Test all colors together (should be white)
     dut._log.info("Testing all colors (White)")
-    await press_button_edge(dut, {}, {'a': 1})
-    await ClockCycles(dut.clk, 5)
-    await press_button_edge(dut, {}, {'y': 1})
-    await ClockCycles(dut.clk, 5)
-    await press_button_edge(dut, {}, {'x': 1})
-    await ClockCycles(dut.clk, 5)
+    await press_sequence(dut, [{'a': 1}, {'y': 1}, {'x': 1}], spacing=5)
     
     dut._log.info("Color mixing test passed ✅")
 
@@ -120,22 +164,18 @@ async def test_brush_size(dut):
     # Reset
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    set_ui_in(dut, 0)
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await ClockCycles(dut.clk, 10)
     
     # Test R button (increase size)
     dut._log.info("Testing R button (increase brush size)")
-    for i in range(3):
-        await press_button_edge(dut, {}, {'r': 1})
-        await ClockCycles(dut.clk, 10)
+    await press_sequence(dut, [{'r': 1}] * 3)
     
     # Test L button (decrease size)
     dut._log.info("Testing L button (decrease brush size)")
-    for i in range(2):
-        await press_button_edge(dut, {}, {'l': 1})
-        await ClockCycles(dut.clk, 10)
+    await press_sequence(dut, [{'l': 1}] * 2)
     
     dut._log.info("Brush size test passed ✅")
 
@@ -147,16 +187,14 @@ async def test_symmetry_mode(dut):
     # Reset
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    set_ui_in(dut, 0)
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await ClockCycles(dut.clk, 10)
     
     # Cycle through symmetry modes
     dut._log.info("Testing Start button (symmetry mode)")
-    for i in range(4):
-        await press_button_edge(dut, {}, {'start': 1})
-        await ClockCycles(dut.clk, 10)
+    await press_sequence(dut, [{'start': 1}] * 4)
     
     dut._log.info("Symmetry mode test passed ✅")
 
@@ -168,7 +206,7 @@ async def test_position_tracking(dut):
     # Reset
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    set_ui_in(dut, 0)
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await ClockCycles(dut.clk, 10)
@@ -210,7 +248,7 @@ async def test_fill_rectangle_mode(dut):
     # Reset
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    set_ui_in(dut, 0)
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await ClockCycles(dut.clk, 10)
@@ -252,7 +290,7 @@ async def test_undo_redo(dut):
     # Reset
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    set_ui_in(dut, 0)
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await ClockCycles(dut.clk, 10)
@@ -386,7 +424,7 @@ async def test_paint_enable_logic(dut):
     # Reset
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    set_ui_in(dut, 0)
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await ClockCycles(dut.clk, 10)
@@ -417,7 +455,7 @@ async def test_integration(dut):
     # Reset
     dut.ena.value = 1
     dut.rst_n.value = 0
-    dut.ui_in.value = 0
+    set_ui_in(dut, 0)
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await ClockCycles(dut.clk, 10)
@@ -425,16 +463,10 @@ async def test_integration(dut):
     dut._log.info("Running integration test: full drawing workflow")
     
     # 1. Set color (Red + Green = Yellow)
-    await press_button_edge(dut, {}, {'a': 1})  # Red
-    await ClockCycles(dut.clk, 5)
-    await press_button_edge(dut, {}, {'y': 1})  # Green
-    await ClockCycles(dut.clk, 5)
+    await press_sequence(dut, [{'a': 1}, {'y': 1}], spacing=5)
     
     # 2. Increase brush size
-    await press_button_edge(dut, {}, {'r': 1})
-    await ClockCycles(dut.clk, 5)
-    await press_button_edge(dut, {}, {'r': 1})
-    await ClockCycles(dut.clk, 5)
+    await press_sequence(dut, [{'r': 1}] * 2, spacing=5)
     
     # 3. Set symmetry mode
     await press_button_edge(dut, {}, {'start': 1})
@@ -455,10 +487,7 @@ async def test_integration(dut):
     await ClockCycles(dut.clk, 10)
     
     # 6. Fill rectangle
-    await press_button_edge(dut, {}, {'select': 1})  # Enable fill mode
-    await ClockCycles(dut.clk, 5)
-    await press_button_edge(dut, {}, {'b': 1})  # Corner A
-    await ClockCycles(dut.clk, 5)
+    await press_sequence(dut, [{'select': 1}, {'b': 1}], spacing=5)  # Enable fill mode, corner A
     await gamepad_pmod_send_buttons(dut, {'right': 1, 'down': 1})
     await ClockCycles(dut.clk, 10)
     await gamepad_pmod_send_buttons(dut, {})